@@ -1,5 +1,6 @@
 import streamlit as st
-import pandas as pd
+from apv_engine import FXPath
+from apv_loans import amortize
 
 # --------------------------------------------------
 # FINAL STREAMLIT APP: APV CALCULATOR
@@ -55,8 +56,8 @@ affiliate_tax_rate = st.number_input("Affiliate prior tax rate (%)", value=20.0,
 # --------------------------------------------------
 if st.button("📈 Calculate APV"):
 
-    def S_t(t):
-        return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
 
     depreciation_eur = C0_eur / years
 
@@ -81,14 +82,13 @@ if st.button("📈 Calculate APV"):
     pv_dep = round(pv_dep, 2)
 
     # Exhibit 18.4–18.5 - Concessional Loan Benefit
-    principal_payment = concession_loan_eur / years
-    remaining = concession_loan_eur
+    # One schedule, read by Exhibits 18.5 and 18.6
+    loan = amortize(concession_loan_eur, i_c, years)
     pv_concess_payments = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, principal_payment = loan.at(t)
         payment_usd = (principal_payment + interest) * S_t(t)
         pv_concess_payments += payment_usd / ((1 + i_d) ** t)
-        remaining -= principal_payment
     pv_concess_payments = round(pv_concess_payments, 2)
     pv_loan_benefit = round(concession_loan_eur * S0 - pv_concess_payments, 2)
 
@@ -98,13 +98,11 @@ if st.button("📈 Calculate APV"):
     lambda_parent = borrowing_capacity_usd / project_cost_usd
     lambda_project = lambda_parent / loan_ratio
 
-    remaining = concession_loan_eur
     pv_interest_tax = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, _ = loan.at(t)
         shield_usd = S_t(t) * interest * lambda_project * tax
         pv_interest_tax += shield_usd / ((1 + i_d) ** t)
-        remaining -= principal_payment
     pv_interest_tax = round(pv_interest_tax, 2)
 
     # Freed-up affiliate funds (automatically calculated)
@@ -0,0 +1,185 @@
+# apv_bench.py
+# Benchmark suite for the APV computation paths.
+#
+#   python apv_bench.py                      # full sweep -> bench_output.txt
+#   python apv_bench.py --quick              # small sweep for a smoke run
+#   python apv_bench.py --compare old.txt    # print speed ratios against a saved run
+#
+# Paths timed for every (years, batch size) cell:
+#   original     the pre-engine app code: per-year loops building rows of dicts with
+#                round() and four DataFrames (compute_loop(p, frames=True)), once per project
+#   loop         the same per-year loops without rows, rounding or DataFrames
+#                (apv_engine.compute_loop): the numeric cost of the loop code alone
+#   vectorized   apv_engine.compute (NumPy over the year axis), once per project
+#   closed_form  apv_closed_form.compute_closed_form on the whole batch
+#   batch        apv_engine.compute_batch on the whole batch
+#   exact        apv_money.compute_batch_exact (int64 cents) on the whole batch
+# plus, for single scenarios, the exhibit DataFrame build
+# (apv_engine.exhibit_frames) on its own, separate from the numeric core.
+#
+# Results are written as JSON so two runs can be diffed or compared.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from apv_closed_form import compute_closed_form
+from apv_engine import APVParams, compute, compute_batch, compute_loop, exhibit_frames
+from apv_money import compute_batch_exact
+
+YEARS = (8, 30, 100, 1000)
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+QUICK_YEARS = (8, 30)
+QUICK_BATCH_SIZES = (1, 100, 10_000)
+
+# Skip cells whose work would take minutes or gigabytes
+MAX_LOOP_CELLS = 200_000        # projects × years through the Python loops
+MAX_ORIGINAL = 1_000            # projects through the rows-of-dicts + DataFrame path
+MAX_PER_PROJECT = 20_000        # projects through the single-scenario vectorized path
+MAX_BATCH_CELLS = 20_000_000    # projects × years through the (N, T) batch kernel
+
+
+def time_call(fn, min_time=0.2, repeat=3):
+    """Best-of-``repeat`` seconds per call, looping until ``min_time`` elapses."""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def portfolio(n, years, seed=0):
+    """``n`` Centralia variants with perturbed S0, inflation and volumes."""
+    rng = np.random.default_rng(seed)
+    base = APVParams(years=years)
+    return {
+        "S0": rng.uniform(1.1, 1.5, n),
+        "pi_f": rng.uniform(0.01, 0.04, n),
+        "pi_d": rng.uniform(0.01, 0.04, n),
+        "units_y1": base.units_y1 * rng.uniform(0.8, 1.2, n),
+        "C0_eur": base.C0_eur * rng.uniform(0.8, 1.2, n),
+        "years": np.full(n, years),
+    }
+
+
+def _rows(cols):
+    n = len(cols["S0"])
+    return [APVParams(**{k: v[i].item() for k, v in cols.items()}) for i in range(n)]
+
+
+def bench_cell(years, n, min_time=0.2):
+    cols = portfolio(n, years)
+    cells = n * years
+    out = {"years": years, "batch_size": n}
+
+    if cells <= MAX_LOOP_CELLS or n <= MAX_PER_PROJECT:
+        rows = _rows(cols)
+        if cells <= MAX_LOOP_CELLS and n <= MAX_ORIGINAL:
+            out["original"] = time_call(lambda: [compute_loop(p, frames=True) for p in rows], min_time)
+        if cells <= MAX_LOOP_CELLS:
+            out["loop"] = time_call(lambda: [compute_loop(p) for p in rows], min_time)
+        if n <= MAX_PER_PROJECT:
+            out["vectorized"] = time_call(lambda: [compute(p) for p in rows], min_time)
+
+    out["closed_form"] = time_call(lambda: compute_closed_form(cols), min_time)
+    if cells <= MAX_BATCH_CELLS:
+        out["batch"] = time_call(lambda: compute_batch(cols), min_time)
+        out["exact"] = time_call(lambda: compute_batch_exact(cols), min_time)
+
+    if n == 1:
+        result = compute(APVParams(years=years))
+        out["dataframe_build"] = time_call(lambda: exhibit_frames(result), min_time)
+    return out
+
+
+def run(years=YEARS, batch_sizes=BATCH_SIZES, min_time=0.2, log=None):
+    results = []
+    for y in years:
+        for n in batch_sizes:
+            cell = bench_cell(y, n, min_time)
+            results.append(cell)
+            if log:
+                log(_format_cell(cell))
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "units": "seconds per call (whole batch)",
+        "results": results,
+    }
+
+
+_PATHS = ("original", "loop", "vectorized", "closed_form", "batch", "exact", "dataframe_build")
+
+
+def _format_cell(cell):
+    parts = [f"years={cell['years']:<5} n={cell['batch_size']:<8}"]
+    for k in _PATHS:
+        if k in cell:
+            parts.append(f"{k}={cell[k] * 1e3:10.3f} ms")
+    return "  ".join(parts)
+
+
+def compare(old, new):
+    """Lines of new/old time ratios for every path present in both runs."""
+    index = {(c["years"], c["batch_size"]): c for c in old["results"]}
+    lines = []
+    for cell in new["results"]:
+        prev = index.get((cell["years"], cell["batch_size"]))
+        if prev is None:
+            continue
+        ratios = [f"{k}={cell[k] / prev[k]:.2f}x" for k in _PATHS if k in cell and k in prev]
+        lines.append(f"years={cell['years']:<5} n={cell['batch_size']:<8} " + "  ".join(ratios))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the APV computation paths.")
+    parser.add_argument("--output", default="bench_output.txt", help="JSON results file")
+    parser.add_argument("--quick", action="store_true", help="small sweep for a smoke run")
+    parser.add_argument("--years", type=int, nargs="+", help="horizons to sweep")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", help="batch sizes to sweep")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing loop")
+    parser.add_argument("--compare", help="earlier JSON results to compare against (new/old)")
+    args = parser.parse_args(argv)
+
+    years = args.years or (QUICK_YEARS if args.quick else YEARS)
+    sizes = args.batch_sizes or (QUICK_BATCH_SIZES if args.quick else BATCH_SIZES)
+    # Read the baseline first: it may be the file this run overwrites
+    old = None
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+    report = run(years, sizes, args.min_time, log=print)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if old is not None:
+        print(f"\nnew / old time (lower is faster) vs {args.compare}:")
+        for line in compare(old, report):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# apv_breakeven.py
+# Break-even solver: the value of one chosen input at which APV = 0, for one
+# project or thousands at once.
+#
+# Each project gets its own bracket, found by stepping outwards from its
+# current value until APV changes sign. It is then refined with safeguarded
+# Newton iterations: a Newton step (finite-difference slope) is taken when it
+# lands inside the bracket, a bisection step otherwise. Every iteration is a
+# single vectorized closed-form APV evaluation over the projects that have
+# not converged yet.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from apv_closed_form import closed_form_apv
+from apv_engine import PARAM_FIELDS, stack_params
+from apv_sensitivity import PERCENT_INPUTS, SWEEP_INPUTS
+
+# Labels of the inputs that have no sweep in the sensitivity panel
+_LABELS = {
+    **SWEEP_INPUTS,
+    "borrowing_capacity_usd": "Borrowing capacity ($)",
+    "lost_units_y1": "Year-1 lost export units",
+    "lost_margin_usd_y1": "Year-1 lost margin per unit ($)",
+    "affiliate_after_tax_retained": "Affiliate retained funds (€)",
+    "affiliate_prior_tax_rate": "Affiliate prior tax rate",
+}
+BREAKEVEN_PERCENT = PERCENT_INPUTS | {"affiliate_prior_tax_rate"}
+
+# Any continuous input can be solved for; project life is an integer
+BREAKEVEN_INPUTS = {k: _LABELS[k] for k in PARAM_FIELDS if k != "years"}
+
+# Admissible range per input (rates and growths stay above -100%, tax rates
+# within 0..100%); the search never steps outside it
+LOWER_BOUNDS = {
+    "S0": 0.0, "units_y1": 0.0, "selling_price": 0.0, "production_cost": 0.0,
+    "C0_eur": 0.0, "concession_loan_eur": 0.0, "tax": 0.0,
+    "borrowing_capacity_usd": 0.0, "lost_units_y1": 0.0, "lost_margin_usd_y1": 0.0,
+    "affiliate_after_tax_retained": 0.0, "affiliate_prior_tax_rate": 0.0,
+}
+RATE_LOWER_BOUND = -0.99
+UPPER_BOUNDS = {"tax": 1.0, "affiliate_prior_tax_rate": 1.0}
+
+
+@dataclass
+class BreakEven:
+    name: str
+    base: np.ndarray        # current value of the input per project
+    value: np.ndarray       # break-even value (NaN where no crossing was found)
+    apv: np.ndarray         # APV at ``value`` (residual)
+    converged: np.ndarray   # bool per project
+    iterations: int
+
+    @property
+    def change(self):
+        """Relative move from the current value to break-even."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.value / self.base - 1.0
+
+
+def _apv_of(cols, name, idx):
+    # APV of rows ``idx`` as a function of the chosen input
+    sub = {k: v[idx] for k, v in cols.items()}
+
+    def f(x):
+        sub[name] = x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return closed_form_apv(sub)
+
+    return f
+
+
+def _bracket(f, x0, f0, lower, upper, max_expand):
+    # Step out on both sides of x0 by doubling distances until APV changes sign
+    a, b = x0.copy(), x0.copy()
+    fa, fb = f0.copy(), f0.copy()
+    found = f0 == 0
+    step = np.maximum(np.abs(x0) * 0.1, 0.01)
+    for _ in range(max_expand):
+        todo = ~found
+        if not todo.any():
+            break
+        for sign in (-1.0, 1.0):
+            x = np.where(todo, x0 + sign * step, x0)
+            x = np.clip(x, lower, upper)
+            fx = f(x)
+            hit = todo & np.isfinite(fx) & (np.sign(fx) != np.sign(f0))
+            if sign < 0:
+                a[hit], fa[hit], b[hit], fb[hit] = x[hit], fx[hit], x0[hit], f0[hit]
+            else:
+                a[hit], fa[hit], b[hit], fb[hit] = x0[hit], f0[hit], x[hit], fx[hit]
+            found |= hit
+            todo &= ~hit
+        step *= 2.0
+    return a, fa, b, fb, found
+
+
+def break_even(scenarios, name, xtol=1e-10, ftol=1e-6, max_iter=100, max_expand=60):
+    """Value of input ``name`` that sets APV to zero, per project.
+
+    ``scenarios`` is anything ``stack_params`` accepts. The crossing nearest
+    the current value is returned; projects with no sign change within the
+    search range get NaN and ``converged = False``. ``ftol`` is in dollars
+    of APV; ``xtol`` is relative to the input's magnitude.
+    """
+    if name not in BREAKEVEN_INPUTS:
+        raise ValueError(f"Cannot solve for {name!r}; choose one of {sorted(BREAKEVEN_INPUTS)}")
+    cols = stack_params(scenarios)
+    x0 = cols[name].copy()
+    n = len(x0)
+    lower = LOWER_BOUNDS.get(name, RATE_LOWER_BOUND)
+    upper = UPPER_BOUNDS.get(name, np.inf)
+
+    f = _apv_of(cols, name, slice(None))
+    f0 = f(x0)
+    a, fa, b, fb, bracketed = _bracket(f, x0, f0, lower, upper, max_expand)
+
+    value = np.full(n, np.nan)
+    resid = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+
+    # Start each bracketed project at the bracket end with the smaller |APV|
+    idx = np.flatnonzero(bracketed)
+    a, fa, b, fb = a[idx], fa[idx], b[idx], fb[idx]
+    use_a = np.abs(fa) <= np.abs(fb)
+    x = np.where(use_a, a, b)
+    fx = np.where(use_a, fa, fb)
+
+    iterations = 0
+    while idx.size and iterations < max_iter:
+        done = (np.abs(fx) <= ftol) | (np.abs(b - a) <= xtol * np.maximum(np.abs(x), 1.0))
+        if done.any():
+            value[idx[done]], resid[idx[done]], converged[idx[done]] = x[done], fx[done], True
+            keep = ~done
+            idx, x, fx, a, fa, b, fb = (v[keep] for v in (idx, x, fx, a, fa, b, fb))
+            if not idx.size:
+                break
+        iterations += 1
+
+        g = _apv_of(cols, name, idx)
+        h = 1e-7 * np.maximum(np.abs(x), 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (g(x + h) - fx) / h
+            newton = x - fx / slope
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        inside = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        x = np.where(inside, newton, 0.5 * (a + b))
+        fx = g(x)
+
+        # Keep the sign change between a and b
+        same_as_a = np.sign(fx) == np.sign(fa)
+        a, fa = np.where(same_as_a, x, a), np.where(same_as_a, fx, fa)
+        b, fb = np.where(same_as_a, b, x), np.where(same_as_a, fb, fx)
+
+    if idx.size:  # out of iterations: report the best estimate, not converged
+        value[idx], resid[idx] = x, fx
+
+    return BreakEven(name, x0, value, resid, converged, iterations)
+
+
+def break_even_table(base, names=None):
+    """Break-even of every input (one at a time) for a single scenario.
+
+    Returns a list of dicts with the input, its current and break-even
+    values (display units, % for rates) and the relative change.
+    """
+    rows = []
+    for name in names or BREAKEVEN_INPUTS:
+        r = break_even([base], name)
+        scale = 100.0 if name in BREAKEVEN_PERCENT else 1.0
+        rows.append({
+            "input": name,
+            "label": BREAKEVEN_INPUTS[name] + (" (%)" if name in BREAKEVEN_PERCENT else ""),
+            "current": float(r.base[0]) * scale,
+            "break_even": float(r.value[0]) * scale,
+            "change": float(r.change[0]),
+            "converged": bool(r.converged[0]),
+        })
+    return rows
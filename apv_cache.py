@@ -0,0 +1,173 @@
+# apv_cache.py
+# Process-wide memoization for the APV apps.
+#
+# Streamlit reruns the whole script on every widget change, but imported
+# modules live for the life of the server process. Results cached here are
+# therefore shared between reruns and between sessions: flipping back to a
+# previous scenario, or many users opening the default Centralia case, is a
+# cache hit instead of a recomputation.
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+
+import apv_profile
+from apv_engine import compute, exhibit_frames
+
+
+def params_key(params, kind="compute"):
+    """Canonical SHA-256 of a parameter set (APVParams or plain mapping).
+
+    Numbers are normalized (``years`` as int, everything else as the repr of
+    a float) so equal parameter sets hash the same whether a widget returned
+    8 or 8.0.
+    """
+    items = params.to_dict() if hasattr(params, "to_dict") else dict(params)
+    canon = {}
+    for k, v in items.items():
+        if v is None or isinstance(v, (str, bool)):
+            canon[k] = v
+        elif k == "years":
+            canon[k] = int(v)
+        else:
+            canon[k] = repr(float(v) + 0.0)
+    payload = json.dumps({"kind": kind, "params": canon}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def estimate_nbytes(value, _seen=None):
+    """Approximate memory held by a cached value (arrays, frames, containers)."""
+    _seen = _seen if _seen is not None else set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):  # DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes"):  # ndarray
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v, _seen) for v in value)
+    if is_dataclass(value):
+        return sys.getsizeof(value) + sum(
+            estimate_nbytes(getattr(value, f.name), _seen) for f in fields(value))
+    return sys.getsizeof(value)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    nbytes: int = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and estimated bytes."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 2 ** 20):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._data = OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.RLock()
+        self._stats = CacheStats()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._stats.hits += 1
+                apv_profile.count("cache_hits")
+                return self._data[key][0]
+            self._stats.misses += 1
+            apv_profile.count("cache_misses")
+            return default
+
+    def put(self, key, value):
+        nbytes = estimate_nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._stats.nbytes -= self._data.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return value  # too big to ever fit; don't flush everything else
+            self._data[key] = (value, nbytes)
+            self._stats.nbytes += nbytes
+            while len(self._data) > self.max_entries or self._stats.nbytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._stats.nbytes -= evicted
+                self._stats.evictions += 1
+        return value
+
+    def get_or_compute(self, key, fn):
+        # Compute outside the lock so slow misses don't serialize other users;
+        # two sessions missing the same key at once may both compute it.
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, fn())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._stats = CacheStats()
+
+    def stats(self):
+        with self._lock:
+            s = self._stats
+            return CacheStats(s.hits, s.misses, s.evictions, len(self._data), s.nbytes)
+
+
+# -------------------------------
+# Shared instance used by the apps
+# -------------------------------
+default_cache = LRUCache(
+    max_entries=int(os.environ.get("APV_CACHE_MAX_ENTRIES", 256)),
+    max_bytes=int(float(os.environ.get("APV_CACHE_MAX_MB", 64)) * 2 ** 20),
+)
+
+
+def cached_compute(params, cache=None, graph=None):
+    """``apv_engine.compute`` through the shared cache.
+
+    On a miss, an ``apv_graph.APVGraph`` (if given) rebuilds only the
+    exhibits whose inputs changed since its previous run.
+    """
+    cache = default_cache if cache is None else cache
+    build = (lambda: compute(params)) if graph is None else (lambda: graph.compute(params))
+    return cache.get_or_compute(params_key(params, "compute"), build)
+
+
+def cached_compute_all(params, cache=None, graph=None):
+    """Exhibit DataFrames and summary metrics through the shared cache.
+
+    On a miss, an ``apv_graph.APVGraph`` (if given) rebuilds only the
+    exhibits whose inputs changed since its previous run.
+    """
+    cache = default_cache if cache is None else cache
+
+    def build():
+        if graph is not None:
+            return graph.compute_all(params)
+        result = cached_compute(params, cache)
+        return (*exhibit_frames(result), result.meta)
+
+    return cache.get_or_compute(params_key(params, "frames"), build)
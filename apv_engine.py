@@ -0,0 +1,640 @@
+# apv_engine.py
+# Headless APV engine for the Centralia case (Exhibits 18.2–18.6).
+#
+# Everything here works on NumPy arrays over the year axis t = 1..years and
+# takes an explicit APVParams object instead of Streamlit widget globals, so
+# it can be imported by the apps, batch jobs and scripts alike.
+
+from dataclasses import dataclass, asdict, fields
+
+import numpy as np
+
+from apv_loans import amortize
+from apv_profile import stage
+
+
+@dataclass(frozen=True)
+class APVParams:
+    """Inputs of one APV scenario. Defaults reproduce the Centralia case."""
+
+    S0: float = 1.32
+    pi_f: float = 0.021
+    pi_d: float = 0.03
+    C0_eur: float = 5_500_000.0
+    years: int = 8
+    tax: float = 0.35
+    K_ud: float = 0.12
+    i_c: float = 0.05
+    i_d: float = 0.08
+    borrowing_capacity_usd: float = 2_904_000.0
+    units_y1: float = 25_000.0
+    units_growth: float = 0.12
+    selling_price: float = 200.0
+    production_cost: float = 160.0
+    contrib_growth: float = 0.021
+    lost_units_y1: float = 9_600.0
+    lost_units_growth: float = 0.05
+    lost_margin_usd_y1: float = 35.0
+    lost_margin_growth: float = 0.03
+    concession_loan_eur: float = 4_000_000.0
+    affiliate_after_tax_retained: float = 750_000.0
+    affiliate_prior_tax_rate: float = 0.20
+
+    @property
+    def contribution_per_unit(self):
+        return self.selling_price - self.production_cost
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class APVResult:
+    """Per-year exhibit columns (full precision) plus the summary metrics."""
+
+    exhibit_182: dict
+    exhibit_183: dict
+    exhibit_185: dict
+    exhibit_186: dict
+    meta: dict
+
+
+# -------------------------------
+# Shared year-axis vectors
+# -------------------------------
+def year_axis(years):
+    return np.arange(1, int(years) + 1, dtype=np.float64)
+
+
+class FXPath:
+    """Expected spot path S_t for t = 1..T, built once and shared read-only.
+
+    ``spot`` is (T,) for one scenario or (N, T) for a portfolio; ``S0`` is the
+    matching scalar or (N, 1) column.
+    """
+
+    __slots__ = ("S0", "spot")
+
+    def __init__(self, S0, spot):
+        spot = np.array(spot, dtype=np.float64)
+        spot.setflags(write=False)
+        self.S0 = S0
+        self.spot = spot
+
+    @classmethod
+    def ppp(cls, S0, pi_d, pi_f, years):
+        """PPP path S_t = S0 * prod_{k<=t} (1 + pi_d_k) / (1 + pi_f_k).
+
+        ``pi_d`` / ``pi_f`` are constants, per-scenario (N, 1) columns or
+        per-year forecast curves (T,) / (N, T); curves longer than ``years``
+        are cut to the first ``years`` entries. Constant rates give the
+        familiar S0 * (1 + pi_d)^t / (1 + pi_f)^t.
+        """
+        T = int(years)
+        drift = (1 + _curve(pi_d, T)) / (1 + _curve(pi_f, T))
+        shape = np.broadcast_shapes(np.shape(drift), np.shape(S0)[:-1] + (T,))
+        return cls(S0, S0 * np.cumprod(np.broadcast_to(drift, shape), axis=-1))
+
+    @property
+    def years(self):
+        return self.spot.shape[-1]
+
+    def at(self, t):
+        """S_t for a 1-based year ``t`` (single-scenario paths)."""
+        return float(self.spot[t - 1])
+
+    def scaled(self, factor):
+        """Path multiplied by ``factor`` (e.g. an (N, 1) FX shock), S0 unchanged."""
+        return FXPath(self.S0, self.spot * factor)
+
+
+def _curve(rate, T):
+    # Constants and (N, 1) columns pass through; per-year curves are cut to T
+    rate = np.asarray(rate, dtype=np.float64)
+    if rate.ndim == 0 or rate.shape[-1] == 1:
+        return rate
+    if rate.shape[-1] < T:
+        raise ValueError(f"Inflation curve has {rate.shape[-1]} years, need at least {T}")
+    return rate[..., :T]
+
+
+def fx_path(p, years):
+    # PPP adjusted expected spot path from the scenario's constant inflation rates
+    return FXPath.ppp(p.S0, p.pi_d, p.pi_f, years)
+
+
+def _check_path(fx, years):
+    if fx.years != int(years):
+        raise ValueError(f"FX path covers {fx.years} years, project life is {int(years)}")
+    return fx
+
+
+def discount_factors(rate, t):
+    return (1 + rate) ** t
+
+
+def _along(value, t):
+    # Repeat a per-scenario constant along the year axis
+    return value * np.ones_like(t)
+
+
+# -------------------------------
+# Exhibits
+# -------------------------------
+def exhibit_182(p, t, S, disc_k):
+    # After-tax operating cash flows, discounted at K_ud
+    cm_eur = p.contribution_per_unit * (1 + p.contrib_growth) ** (t - 1)
+    qty = p.units_y1 * (1 + p.units_growth) ** (t - 1)
+    a_usd = S * qty * cm_eur
+    lost_q = p.lost_units_y1 * (1 + p.lost_units_growth) ** t
+    lost_margin_usd_t = p.lost_margin_usd_y1 * (1 + p.lost_margin_growth) ** t
+    b_usd = -lost_q * lost_margin_usd_t
+    ocf = a_usd + b_usd
+    ocf_aftertax = ocf * (1 - p.tax)
+    pv = ocf_aftertax / disc_k
+    return {
+        "year": t, "S_t": S, "cm_eur": cm_eur, "qty": qty, "a_usd": a_usd,
+        "b_usd": b_usd, "ocf": ocf, "ocf_aftertax": ocf_aftertax, "pv": pv,
+    }
+
+
+def exhibit_183(p, t, S, disc_d):
+    # Depreciation tax shields (straight-line), discounted at i_d
+    depreciation_eur = _along(p.C0_eur / p.years, t)
+    shield_usd = p.tax * depreciation_eur * S
+    pv = shield_usd / disc_d
+    return {
+        "year": t, "S_t": S, "depreciation_eur": depreciation_eur,
+        "shield_usd": shield_usd, "pv": pv,
+    }
+
+
+def loan_schedule(p, t, loan=None):
+    # Balance at the start of year t, its interest and the principal repaid;
+    # equal principal unless ``loan`` (apv_loans.LoanTerms) says otherwise
+    return amortize(p.concession_loan_eur, p.i_c, p.years, t, loan)
+
+
+def exhibit_185(p, t, S, disc_d, schedule):
+    # Concessional loan payments converted at S_t, discounted at i_d
+    remaining, interest, principal = schedule
+    payment_eur = principal + interest
+    payment_usd = payment_eur * S
+    pv = payment_usd / disc_d
+    return {
+        "year": t, "remaining": remaining, "interest": interest,
+        "principal": principal, "payment_eur": payment_eur, "S_t": S,
+        "payment_usd": payment_usd, "pv": pv,
+    }
+
+
+def debt_ratios(p):
+    # lambda_parent = borrowing capacity / project USD cost,
+    # lambda_project = lambda_parent / (loan / project cost)
+    lambda_parent = p.borrowing_capacity_usd / (p.C0_eur * p.S0)
+    loan_ratio = p.concession_loan_eur / p.C0_eur
+    return lambda_parent, lambda_parent / loan_ratio
+
+
+def exhibit_186(p, t, S, disc_d, schedule, lambda_project):
+    # Interest tax shields on the concessional loan, discounted at i_d
+    _, interest, _ = schedule
+    lam = _along(lambda_project, t)
+    shield_usd = S * interest * lam * p.tax
+    pv = shield_usd / disc_d
+    return {
+        "year": t, "S_t": S, "interest": interest, "lambda_project": lam,
+        "shield_usd": shield_usd, "pv": pv,
+    }
+
+
+def freed_up_funds(p):
+    # Affiliate funds are held AFTER foreign tax; gross up, convert at S0 and
+    # credit the tax-rate differential
+    gross_eur = p.affiliate_after_tax_retained / (1 - p.affiliate_prior_tax_rate)
+    return (p.tax - p.affiliate_prior_tax_rate) * gross_eur * p.S0
+
+
+# -------------------------------
+# Full run
+# -------------------------------
+def compute(p, fx=None, loan=None):
+    """Run Exhibits 18.2–18.6, freed-up funds and the APV for one scenario.
+
+    ``fx`` replaces the constant-inflation PPP path with a prebuilt FXPath,
+    e.g. ``FXPath.ppp(p.S0, pi_d_curve, pi_f_curve, p.years)``. ``loan`` is an
+    optional apv_loans.LoanTerms (annuity, bullet, grace years).
+    """
+    t = year_axis(p.years)
+    with stage("ppp_path"):
+        fx = fx_path(p, p.years) if fx is None else _check_path(fx, p.years)
+        S = fx.spot
+    lambda_parent, lambda_project = debt_ratios(p)
+
+    with stage("exhibit_18_2"):
+        ex182 = exhibit_182(p, t, S, discount_factors(p.K_ud, t))
+    with stage("exhibit_18_3"):
+        disc_d = discount_factors(p.i_d, t)
+        ex183 = exhibit_183(p, t, S, disc_d)
+    with stage("exhibit_18_5"):
+        schedule = loan_schedule(p, t, loan)
+        ex185 = exhibit_185(p, t, S, disc_d, schedule)
+    with stage("exhibit_18_6"):
+        ex186 = exhibit_186(p, t, S, disc_d, schedule, lambda_project)
+
+    with stage("freed_up_funds"):
+        freed_up_usd = freed_up_funds(p)
+
+    meta = summary(p, ex182, ex183, ex185, ex186, freed_up_usd, lambda_parent, lambda_project)
+    return APVResult(ex182, ex183, ex185, ex186, meta)
+
+
+def summary(p, ex182, ex183, ex185, ex186, freed_up_usd, lambda_parent, lambda_project):
+    """Final APV and its components from the four exhibits."""
+    return totals(p, float(ex182["pv"].sum()), float(ex183["pv"].sum()),
+                  float(ex185["pv"].sum()), float(ex186["pv"].sum()),
+                  float(freed_up_usd), lambda_parent, lambda_project)
+
+
+def totals(p, pv_operating, pv_dep, pv_concess_payments, pv_interest_tax,
+           freed_up_usd, lambda_parent, lambda_project):
+    # Full precision throughout; rounding to cents is a display format only,
+    # so the APV carries no accumulated rounding drift
+    loan_benefit = p.concession_loan_eur * p.S0 - pv_concess_payments
+    initial_invest_usd = p.C0_eur * p.S0
+    apv = (pv_operating + pv_dep + loan_benefit + pv_interest_tax
+           + freed_up_usd - initial_invest_usd)
+    return {
+        "pv_operating": pv_operating,
+        "pv_dep": pv_dep,
+        "pv_concess_payments": pv_concess_payments,
+        "loan_benefit": loan_benefit,
+        "pv_interest_tax": pv_interest_tax,
+        "freed_up_usd": freed_up_usd,
+        "initial_invest_usd": initial_invest_usd,
+        "apv": apv,
+        "lambda_parent": lambda_parent,
+        "lambda_project": lambda_project,
+    }
+
+
+def compute_loop(p, exact=False, frames=False):
+    """Reference implementation with the original per-year Python loops.
+
+    Kept for benchmarking and for cross-checking the vectorized paths; returns
+    the same ``meta`` dict as ``compute``. With ``exact`` each year's PV is
+    rounded to whole cents and the components come back as int cents, as in
+    apv_money.compute_batch_exact. With ``frames`` the loops also build the
+    original app's rounded row dicts and return ``(df182, df183, df185,
+    df186, meta)`` like ``compute_all``.
+    """
+    years = int(p.years)
+    if exact:
+        from apv_money import exact_totals, to_cents
+
+        def term(x):
+            return int(to_cents(x))
+    else:
+        term = float
+    rows_182, rows_183, rows_185, rows_186 = [], [], [], []
+
+    def S_t(t):
+        return p.S0 * ((1 + p.pi_d) ** t) / ((1 + p.pi_f) ** t)
+
+    pv_operating = term(0.0)
+    for t in range(1, years + 1):
+        cm_eur = p.contribution_per_unit * ((1 + p.contrib_growth) ** (t - 1))
+        qty = p.units_y1 * ((1 + p.units_growth) ** (t - 1))
+        a_usd = S_t(t) * qty * cm_eur
+        lost_q = p.lost_units_y1 * ((1 + p.lost_units_growth) ** t)
+        lost_margin_usd_t = p.lost_margin_usd_y1 * ((1 + p.lost_margin_growth) ** t)
+        ocf = a_usd - lost_q * lost_margin_usd_t
+        pv = ocf * (1 - p.tax) / ((1 + p.K_ud) ** t)
+        pv_operating += term(pv)
+        if frames:
+            rows_182.append({
+                "Year": t, "S_t ($/€)": round(S_t(t), 6), "CM €/unit (year t)": round(cm_eur, 2),
+                "Qty (year t)": int(round(qty)), "Sales (USD) = S_t×Qty×CM": round(a_usd, 2),
+                "Lost Sales ($)": round(-lost_q * lost_margin_usd_t, 2), "OCF ($)": round(ocf, 2),
+                "OCF(1-τ) ($)": round(ocf * (1 - p.tax), 2), "PV @ K_ud ($)": round(pv, 2),
+            })
+
+    depreciation_eur = p.C0_eur / years
+    pv_dep = term(0.0)
+    for t in range(1, years + 1):
+        shield_usd = p.tax * depreciation_eur * S_t(t)
+        pv = shield_usd / ((1 + p.i_d) ** t)
+        pv_dep += term(pv)
+        if frames:
+            rows_183.append({
+                "Year": t, "S_t ($/€)": round(S_t(t), 6), "D_t (€)": round(depreciation_eur, 2),
+                "S_t × τ × D_t ($)": round(shield_usd, 2), "PV @ i_d ($)": round(pv, 2),
+            })
+
+    principal_payment = p.concession_loan_eur / years
+    remaining = p.concession_loan_eur
+    pv_concess_payments = term(0.0)
+    for t in range(1, years + 1):
+        interest = remaining * p.i_c
+        payment_eur = principal_payment + interest
+        pv = payment_eur * S_t(t) / ((1 + p.i_d) ** t)
+        pv_concess_payments += term(pv)
+        if frames:
+            rows_185.append({
+                "Year": t, "Remaining (€) start": round(remaining, 2), "Interest (€)": round(interest, 2),
+                "Principal (€)": round(principal_payment, 2), "Payment (€)": round(payment_eur, 2),
+                "S_t ($/€)": round(S_t(t), 6), "Payment (USD)": round(payment_eur * S_t(t), 2),
+                "PV @ i_d (USD)": round(pv, 2),
+            })
+        remaining -= principal_payment
+    lambda_parent, lambda_project = debt_ratios(p)
+    remaining = p.concession_loan_eur
+    pv_interest_tax = term(0.0)
+    for t in range(1, years + 1):
+        interest = remaining * p.i_c
+        shield_usd = S_t(t) * interest * lambda_project * p.tax
+        pv = shield_usd / ((1 + p.i_d) ** t)
+        pv_interest_tax += term(pv)
+        if frames:
+            rows_186.append({
+                "Year": t, "S_t ($/€)": round(S_t(t), 6), "I_t (€)": round(interest, 2),
+                "λ / Project debt ratio": round(lambda_project, 6),
+                "S_t × λ × τ × I_t ($)": round(shield_usd, 2), "PV @ i_d ($)": round(pv, 2),
+            })
+        remaining -= principal_payment
+
+    if exact:
+        pv = {"pv_operating": pv_operating, "pv_dep": pv_dep,
+              "pv_concess_payments": pv_concess_payments, "pv_interest_tax": pv_interest_tax}
+        out = exact_totals(p.concession_loan_eur * p.S0, p.C0_eur * p.S0, pv, freed_up_funds(p))
+        meta = {**{k: int(v) for k, v in out.items()},
+                "lambda_parent": lambda_parent, "lambda_project": lambda_project}
+    else:
+        meta = totals(p, pv_operating, pv_dep, pv_concess_payments, pv_interest_tax,
+                      freed_up_funds(p), lambda_parent, lambda_project)
+    if not frames:
+        return meta
+    import pandas as pd
+
+    return (pd.DataFrame(rows_182), pd.DataFrame(rows_183), pd.DataFrame(rows_185),
+            pd.DataFrame(rows_186), meta)
+
+
+# -------------------------------
+# Portfolio (projects × years)
+# -------------------------------
+PARAM_FIELDS = tuple(f.name for f in fields(APVParams))
+
+COMPONENTS = (
+    "pv_operating", "pv_dep", "pv_concess_payments", "loan_benefit",
+    "pv_interest_tax", "freed_up_usd", "initial_invest_usd", "apv",
+)
+
+
+def _check_fields(names):
+    unknown = set(names) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown APV parameter(s): {sorted(unknown)}")
+
+
+def stack_params(scenarios):
+    """Columnar form of a portfolio: one 1-D array per APVParams field.
+
+    ``scenarios`` is either a sequence of APVParams / dicts, or a mapping of
+    field name -> array. Fields left out take the APVParams default. An
+    ``apv_scenarios.ScenarioSet`` (or a chunk of one) converts itself.
+    """
+    if hasattr(scenarios, "to_columns"):
+        return scenarios.to_columns()
+    defaults = APVParams().to_dict()
+    if isinstance(scenarios, dict):
+        _check_fields(scenarios)
+        n = max((np.size(v) for v in scenarios.values()), default=1)
+        cols = {k: np.broadcast_to(np.asarray(scenarios.get(k, defaults[k])), (n,))
+                for k in PARAM_FIELDS}
+    else:
+        rows = []
+        for s in scenarios:
+            if isinstance(s, APVParams):
+                rows.append(s.to_dict())
+            else:
+                _check_fields(s)
+                rows.append({**defaults, **s})
+        cols = {k: np.array([r[k] for r in rows]) for k in PARAM_FIELDS}
+
+    cols = {k: v.astype(np.float64) for k, v in cols.items()}
+    cols["years"] = cols["years"].astype(np.int64)
+    if (cols["years"] < 1).any():
+        raise ValueError("Project life (years) must be at least 1")
+    return cols
+
+
+def batch_exhibits(cols, fx_factor=None, fx=None, loan=None):
+    """All four exhibits for stacked columns, one (N, T) column per field.
+
+    Returns ``(mask, exhibits, p)``: the (N, T) mask of years within each
+    project's life, the exhibit dicts keyed like APVResult's attributes
+    (values broadcastable to (N, T); padded years are not meaningful) and
+    the (N, 1)-column APVParams they were computed from. ``fx``,
+    ``fx_factor`` and ``loan`` are as for ``batch_components``.
+    """
+    years = cols["years"]
+    # Every field becomes an (N, 1) column so it broadcasts against t (1, T)
+    p = APVParams(**{k: v[:, None] for k, v in cols.items()})
+    t = year_axis(years.max())[None, :]
+    mask = t <= p.years
+
+    fx = fx_path(p, t.shape[-1]) if fx is None else _check_path(fx, t.shape[-1])
+    if fx_factor is not None:
+        fx = fx.scaled(fx_factor)
+    S = fx.spot
+    disc_k = discount_factors(p.K_ud, t)
+    disc_d = discount_factors(p.i_d, t)
+    schedule = loan_schedule(p, t, loan)
+    _, lambda_project = debt_ratios(p)
+
+    exhibits = {
+        "exhibit_182": exhibit_182(p, t, S, disc_k),
+        "exhibit_183": exhibit_183(p, t, S, disc_d),
+        "exhibit_185": exhibit_185(p, t, S, disc_d, schedule),
+        "exhibit_186": exhibit_186(p, t, S, disc_d, schedule, lambda_project),
+    }
+    return mask, exhibits, p
+
+
+# Component PV summed from each exhibit's "pv" column
+EXHIBIT_PVS = {
+    "exhibit_182": "pv_operating",
+    "exhibit_183": "pv_dep",
+    "exhibit_185": "pv_concess_payments",
+    "exhibit_186": "pv_interest_tax",
+}
+
+
+def batch_exhibit_pvs(cols, fx_factor=None, fx=None, loan=None):
+    """Per-year PVs of the four exhibits for stacked columns, before summing.
+
+    Returns ``(mask, pvs, p)`` as for ``batch_exhibits``, with the (N, T) PV
+    matrices keyed like ``batch_components``.
+    """
+    mask, exhibits, p = batch_exhibits(cols, fx_factor, fx, loan)
+    return mask, {EXHIBIT_PVS[k]: ex["pv"] for k, ex in exhibits.items()}, p
+
+
+def batch_components(cols, fx_factor=None, fx=None, loan=None):
+    """Unrounded component PVs for stacked columns (see ``stack_params``).
+
+    ``fx`` is an optional prebuilt (N, T) FXPath (T = longest life in the
+    batch) replacing the constant-inflation PPP paths. ``fx_factor``
+    optionally scales the spot path, e.g. an (N, 1) FX shock or an (N, T)
+    deviation matrix; S0 itself is left untouched. ``loan`` is an optional
+    apv_loans.LoanTerms whose fields may be per-row arrays.
+    """
+    return exhibit_components(*batch_exhibits(cols, fx_factor, fx, loan))
+
+
+def exhibit_components(mask, exhibits, p):
+    """``batch_components`` output from ``batch_exhibits`` output."""
+    out = {EXHIBIT_PVS[k]: np.where(mask, ex["pv"], 0.0).sum(axis=1) for k, ex in exhibits.items()}
+    out["freed_up_usd"] = freed_up_funds(p)[:, 0]
+    out["lambda_project"] = debt_ratios(p)[1][:, 0]
+    return out
+
+
+def batch_apv(cols, fx_factor=None, fx=None):
+    # APV per row only
+    return total_components(cols, batch_components(cols, fx_factor, fx))["apv"]
+
+
+def compute_batch(scenarios, fx=None, loan=None):
+    """APV and component PVs for N projects in one (N, years) evaluation.
+
+    Projects with a shorter life are padded up to the longest horizon in the
+    batch and their padded years are masked out of every PV sum. ``fx`` and
+    ``loan`` are as for ``batch_components``.
+    Returns a dict of length-N arrays keyed by COMPONENTS plus ``lambda_project``.
+    """
+    cols = stack_params(scenarios)
+    return total_components(cols, batch_components(cols, fx=fx, loan=loan))
+
+
+def total_components(cols, c):
+    """Summary arrays (loan benefit, initial investment, APV) from
+    ``batch_components`` output, at full precision like ``compute``."""
+    loan_benefit = cols["concession_loan_eur"] * cols["S0"] - c["pv_concess_payments"]
+    initial_invest_usd = cols["C0_eur"] * cols["S0"]
+    apv = (c["pv_operating"] + c["pv_dep"] + loan_benefit + c["pv_interest_tax"]
+           + c["freed_up_usd"] - initial_invest_usd)
+
+    return {
+        "pv_operating": c["pv_operating"],
+        "pv_dep": c["pv_dep"],
+        "pv_concess_payments": c["pv_concess_payments"],
+        "loan_benefit": loan_benefit,
+        "pv_interest_tax": c["pv_interest_tax"],
+        "freed_up_usd": c["freed_up_usd"],
+        "initial_invest_usd": initial_invest_usd,
+        "apv": apv,
+        "lambda_project": c["lambda_project"],
+    }
+
+
+# -------------------------------
+# Exhibit tables (pandas imported lazily)
+# -------------------------------
+# Tables hold full-precision values; rounding happens only when displayed,
+# using these decimals per column label
+DISPLAY_DECIMALS = {
+    "S_t ($/€)": 6,
+    "λ / Project debt ratio": 6,
+    "Qty (year t)": 0,
+}
+MONEY_DECIMALS = 2
+
+
+def display_decimals(columns):
+    """Decimals to show for each (non-year) column of an exhibit table."""
+    return {c: DISPLAY_DECIMALS.get(c, MONEY_DECIMALS) for c in columns if c != "Year"}
+
+
+def exhibit_frames(result):
+    """Build the four exhibit DataFrames with the labels used in the apps."""
+    with stage("dataframe_build"):
+        return (
+            frame_182(result.exhibit_182),
+            frame_183(result.exhibit_183),
+            frame_185(result.exhibit_185),
+            frame_186(result.exhibit_186),
+        )
+
+
+# (label, exhibit field) per table column, shared by the apps and apv_export
+EXHIBIT_COLUMNS = {
+    "exhibit_182": (
+        ("Year", "year"),
+        ("S_t ($/€)", "S_t"),
+        ("CM €/unit (year t)", "cm_eur"),
+        ("Qty (year t)", "qty"),
+        ("Sales (USD) = S_t×Qty×CM", "a_usd"),
+        ("Lost Sales ($)", "b_usd"),
+        ("OCF ($)", "ocf"),
+        ("OCF(1-τ) ($)", "ocf_aftertax"),
+        ("PV @ K_ud ($)", "pv"),
+    ),
+    "exhibit_183": (
+        ("Year", "year"),
+        ("S_t ($/€)", "S_t"),
+        ("D_t (€)", "depreciation_eur"),
+        ("S_t × τ × D_t ($)", "shield_usd"),
+        ("PV @ i_d ($)", "pv"),
+    ),
+    "exhibit_185": (
+        ("Year", "year"),
+        ("Remaining (€) start", "remaining"),
+        ("Interest (€)", "interest"),
+        ("Principal (€)", "principal"),
+        ("Payment (€)", "payment_eur"),
+        ("S_t ($/€)", "S_t"),
+        ("Payment (USD)", "payment_usd"),
+        ("PV @ i_d (USD)", "pv"),
+    ),
+    "exhibit_186": (
+        ("Year", "year"),
+        ("S_t ($/€)", "S_t"),
+        ("I_t (€)", "interest"),
+        ("λ / Project debt ratio", "lambda_project"),
+        ("S_t × λ × τ × I_t ($)", "shield_usd"),
+        ("PV @ i_d ($)", "pv"),
+    ),
+}
+
+
+def _frame(e, name):
+    import pandas as pd
+
+    return pd.DataFrame({
+        label: e[key].astype(int) if key == "year" else e[key]
+        for label, key in EXHIBIT_COLUMNS[name]
+    })
+
+
+def frame_182(e):
+    return _frame(e, "exhibit_182")
+
+
+def frame_183(e):
+    return _frame(e, "exhibit_183")
+
+
+def frame_185(e):
+    return _frame(e, "exhibit_185")
+
+
+def frame_186(e):
+    return _frame(e, "exhibit_186")
+
+
+def compute_all(p):
+    """Same return shape as ``apv_exhibits_app.compute_all``."""
+    result = compute(p)
+    return (*exhibit_frames(result), result.meta)
@@ -1,234 +1,457 @@
 # final_apv_with_exhibits.py
+import os
+
 import streamlit as st
-import pandas as pd
+import numpy as np
+
+from apv_cache import cached_compute, default_cache
+from apv_engine import COMPONENTS, display_decimals, frame_182, frame_183, frame_185, frame_186
+from apv_graph import APVGraph
+from apv_inputs import centralia_inputs
+import apv_breakeven as be
+import apv_export as export
+import apv_fx as fxm
+import apv_greeks as gk
+import apv_loans as loans
+import apv_montecarlo as mc
+import apv_options as ro
+import apv_profile
+import apv_qmc as qmc
+import apv_sensitivity as sens
+import apv_store as store
 
 st.set_page_config(page_title="APV Calculator with Exhibits", layout="wide")
+
+# Stage timings for this run (APV_PROFILE=1 or ?profile=1); see apv_profile.py
+profiler = apv_profile.Profiler() if apv_profile.enabled(st.query_params.get("profile")) else None
+profile_token = apv_profile.start(profiler)
 st.title("💰 Adjusted Present Value (APV) Calculator — with Exhibits")
 st.caption("APV tool. All key inputs exposed; exhibits generated and labeled.")
 
 st.divider()
-st.header("📥 Project & Financial Parameters (inputs)")
-
-col1, col2 = st.columns(2)
-with col1:
-    S0 = st.number_input("Current exchange rate S0 ($/€)", value=1.32, step=0.01, format="%.4f")
-    pi_f = st.number_input("Foreign inflation rate π_f (%)", value=2.1, step=0.1) / 100.0
-    pi_d = st.number_input("Domestic inflation rate π_d (%)", value=3.0, step=0.1) / 100.0
-    C0_eur = st.number_input("Initial project cost C0 (EUR)", value=5_500_000.0, step=100_000.0, format="%.2f")
-    years = st.number_input("Project life (years)", value=8, step=1)
-with col2:
-    tax = st.number_input("Corporate tax rate τ (%)", value=35.0, step=0.1) / 100.0
-    K_ud = st.number_input("Unlevered cost of capital K_ud (%)", value=12.0, step=0.1) / 100.0
-    i_c = st.number_input("Concessional loan interest rate i_c (%)", value=5.0, step=0.1) / 100.0
-    i_d = st.number_input("Domestic borrowing / discount rate i_d (%)", value=8.0, step=0.1) / 100.0
-    borrowing_capacity_usd = st.number_input("Borrowing capacity (USD)", value=2_904_000.0, step=100_000.0, format="%.2f")
-
-st.divider()
-st.header("📊 Operating & Market Parameters")
-
-col3, col4 = st.columns(2)
-with col3:
-    units_y1 = st.number_input("Year-1 sales units (EU)", value=25_000.0, step=100.0)
-    units_growth = st.number_input("Sales units growth (%)", value=12.0, step=0.1) / 100.0
-    selling_price = st.number_input("Selling price per unit (€)", value=200.0, step=1.0)
-    production_cost = st.number_input("Production cost per unit (€)", value=160.0, step=1.0)
-    contrib_growth = st.number_input("Contribution (price) growth / euro inflation (%)", value=2.1, step=0.1) / 100.0
-with col4:
-    lost_units_y1 = st.number_input("Year-1  export units", value=9_600.0, step=100.0)
-    lost_units_growth = st.number_input(" units growth (%)", value=5.0, step=0.1) / 100.0
-    lost_margin_usd_y1 = st.number_input(" margin per unit (USD) in year1", value=35.0, step=0.1)
-    lost_margin_growth = st.number_input(" margin growth (%)", value=3.0, step=0.1) / 100.0
-    concession_loan_eur = st.number_input("Concessional loan (EUR)", value=4_000_000.0, step=100_000.0)
-
-st.divider()
-st.header("🏦 Affiliate / Tax Details (for Freed-up funds)")
-affiliate_after_tax_retained = st.number_input("Affiliate accumulated funds (after foreign tax) (EUR)", value=750_000.0, step=10_000.0)
-affiliate_prior_tax_rate = st.number_input("Affiliate prior tax rate (%) (used historically)", value=20.0, step=0.1) / 100.0
+inputs = centralia_inputs()
 
 st.divider()
 st.markdown("**Derived values (shown for clarity):**")
 derived_col1, derived_col2 = st.columns(2)
 with derived_col1:
-    contribution_per_unit = selling_price - production_cost
-    st.metric("Derived contribution (€/unit)", f"{contribution_per_unit:.2f}")
-    st.metric("Project cost (USD) = S0 × C0 (USD)", f"{C0_eur * S0:,.2f}")
+    st.metric("Derived contribution (€/unit)", f"{inputs.selling_price - inputs.production_cost:.2f}")
+    st.metric("Project cost (USD) = S0 × C0 (USD)", f"{inputs.C0_eur * inputs.S0:,.2f}")
 with derived_col2:
-    st.metric("Loan / Project ratio (euros)", f"{concession_loan_eur / C0_eur:.4f}")
-    st.metric("Project debt ratio used (λ_parent)", f"{borrowing_capacity_usd / (C0_eur * S0):.4f}")
+    st.metric("Loan / Project ratio (euros)", f"{inputs.concession_loan_eur / inputs.C0_eur:.4f}")
+    st.metric("Project debt ratio used (λ_parent)",
+              f"{inputs.borrowing_capacity_usd / (inputs.C0_eur * inputs.S0):.4f}")
 
 st.divider()
 st.write("Press **Calculate** to generate Exhibits and the APV.")
 
-def S_t(t):
-    # PPP adjusted expected spot S_t = S0 * (1 + pi_d)^t / (1 + pi_f)^t
-    return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
-
-def compute_all():
-    # Depreciation per year (straight-line)
-    depreciation_eur = C0_eur / years
-
-    # EXHIBIT 18.2 - After-tax operating cash flows
-    rows_182 = []
-    pv_operating = 0.0
-    for t in range(1, int(years) + 1):
-        # CM per unit in year t (euros) = (selling_price - production_cost) * (1 + contrib_growth)^(t-1)
-        cm_eur = contribution_per_unit * ((1 + contrib_growth) ** (t - 1))
-        qty = units_y1 * ((1 + units_growth) ** (t - 1))
-        a_usd = S_t(t) * qty * cm_eur  # Sales in USD from new plant
-        lost_q = lost_units_y1 * ((1 + lost_units_growth) ** t)
-        lost_margin_usd_t = lost_margin_usd_y1 * ((1 + lost_margin_growth) ** t)
-        b_usd = - lost_q * lost_margin_usd_t
-        ocf = a_usd + b_usd
-        ocf_aftertax = ocf * (1 - tax)
-        pv = ocf_aftertax / ((1 + K_ud) ** t)
-        pv_operating += pv
-        rows_182.append({
-            "Year": t,
-            "S_t ($/€)": round(S_t(t), 6),
-            "CM €/unit (year t)": round(cm_eur, 2),
-            "Qty (year t)": int(round(qty)),
-            "Sales (USD) = S_t×Qty×CM": round(a_usd, 2),
-            "Lost Sales ($)": round(b_usd, 2),
-            "OCF ($)": round(ocf, 2),
-            "OCF(1-τ) ($)": round(ocf_aftertax, 2),
-            "PV @ K_ud ($)": round(pv, 2)
+def compute(params):
+    # Exhibits 18.2/18.3/18.5/18.6, freed-up funds and the APV come from the
+    # headless engine (apv_engine.py), memoized per parameter set (apv_cache.py);
+    # on a cache miss the session's dependency graph (apv_graph.py) rebuilds
+    # only the exhibits whose inputs changed since the last calculation
+    graph = st.session_state.setdefault("apv_graph", APVGraph())
+    graph.last_run = None
+    return cached_compute(params, graph=graph)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def stored_run_summary(path, column, where):
+    # Streaming passes over a stored run (apv_store.py); runs are immutable
+    # once written, so the summary is cached per run, column and filter
+    run = store.ResultStore.open(path)
+    where = dict(where) or None
+    return {
+        "stats": run.stats(column, where),
+        "percentiles": run.quantiles(column, where=where),
+        "histogram": run.histogram(column, where=where),
+        "rows": run.select(where, limit=100)[0],
+    }
+
+def show_exhibit(title, build, columns, key):
+    # The table is only built while its expander is open; values stay at full
+    # precision and are rounded by the column format
+    box = st.expander(title, on_change="rerun", key=key)
+    with box:
+        if box.open:
+            with apv_profile.stage("dataframe_build"):
+                df = build(columns)
+            st.dataframe(df, use_container_width=True, hide_index=True, column_config={
+                col: st.column_config.NumberColumn(format=f"%.{d}f")
+                for col, d in display_decimals(df.columns).items()
+            })
+
+if st.button("📈 Calculate Exhibits & APV"):
+    # Remember the calculated scenario: opening an exhibit reruns the script
+    st.session_state["apv_params"] = inputs
+
+calc = st.session_state.get("apv_params")
+if calc is not None:
+    result = compute(calc)
+    meta = result.meta
+
+    with apv_profile.stage("streamlit_render"):
+        st.success("✅ Calculation complete")
+        if calc != inputs:
+            st.caption("Inputs changed since this calculation — press Calculate to update.")
+
+        show_exhibit("📘 Exhibit — After-Tax Operating Cash Flows",
+                     frame_182, result.exhibit_182, "exhibit_18_2")
+        show_exhibit("📘 Exhibit — Depreciation Tax Shields",
+                     frame_183, result.exhibit_183, "exhibit_18_3")
+
+        show_exhibit("📘 Exhibit — Concessional Loan Payments & Benefit (PV at i_d)",
+                     frame_185, result.exhibit_185, "exhibit_18_5")
+        st.markdown(f"**Dollar value of concessionary loan at S0** = {calc.concession_loan_eur} × {calc.S0} = ${calc.concession_loan_eur * calc.S0:,.2f}")
+        st.markdown(f"**PV of concessional loan payments (discounted at i_d)** = ${meta['pv_concess_payments']:,.2f}")
+        st.markdown(f"**Value (benefit) of concessional financing** = ${meta['loan_benefit']:,.2f}")
+
+        show_exhibit("📘 Exhibit — Interest Tax Shields",
+                     frame_186, result.exhibit_186, "exhibit_18_6")
+        st.markdown(f"**λ_parent** (borrowing capacity / project USD cost) = {meta['lambda_parent']:.6f}")
+        st.markdown(f"**λ_project** (used in exhibit) = {meta['lambda_project']:.6f}")
+
+        st.divider()
+        st.header("📊 Final APV Summary")
+        import pandas as pd  # deferred: only needed once results are shown
+        summary_df = pd.DataFrame([
+            ["PV (Operating CFs)", meta['pv_operating']],
+            ["PV (Depreciation Shields)", meta['pv_dep']],
+            ["PV (Loan Benefit)", meta['loan_benefit']],
+            ["PV (Interest Shields)", meta['pv_interest_tax']],
+            ["Freed-Up Affiliate Funds", meta['freed_up_usd']],
+            ["Initial Investment (USD)", meta['initial_invest_usd']],
+            ["Final APV", meta['apv']]
+        ], columns=["Component", "Value ($)"])
+        st.dataframe(summary_df, use_container_width=True,
+                     column_config={"Value ($)": st.column_config.NumberColumn(format="%.2f")})
+        st.markdown(f"### 💰 Final APV = **${meta['apv']:,.2f}**")
+        cache_stats = default_cache.stats()
+        st.caption(f"Result cache: {cache_stats.hits} hits / {cache_stats.misses} misses, "
+                   f"{cache_stats.entries} entries ({cache_stats.nbytes / 1024:,.0f} KiB)")
+        graph_run = st.session_state["apv_graph"].last_run
+        if graph_run is not None:
+            st.caption(f"Recomputed: {', '.join(graph_run.recomputed) or 'nothing'} · "
+                       f"reused: {len(graph_run.reused)} nodes")
+
+
+        st.info("Made with ❤️ by Deepesh Pandey")
+
+st.divider()
+with st.expander("🎲 Monte Carlo simulation (inflation, FX and volume risk)"):
+    st.caption("Draws each assumption from a normal distribution centred on the inputs above "
+               "and values every path with the vectorized engine.")
+    mc_col1, mc_col2 = st.columns(2)
+    with mc_col1:
+        n_paths = st.number_input("Number of paths", value=1_000_000, step=100_000, min_value=1_000)
+        sd_pi_d = st.number_input("σ domestic inflation π_d (%)", value=0.5, step=0.1) / 100.0
+        sd_pi_f = st.number_input("σ foreign inflation π_f (%)", value=0.5, step=0.1) / 100.0
+        sd_fx = st.number_input("σ FX shock on S_t (log, %)", value=10.0, step=1.0) / 100.0
+    with mc_col2:
+        sd_units_growth = st.number_input("σ sales units growth (%)", value=3.0, step=0.1) / 100.0
+        sd_lost_units_growth = st.number_input("σ lost units growth (%)", value=2.0, step=0.1) / 100.0
+        sd_lost_margin_growth = st.number_input("σ lost margin growth (%)", value=1.0, step=0.1) / 100.0
+        mc_seed = st.number_input("Random seed", value=42, step=1)
+    fx_col1, fx_col2, fx_col3 = st.columns(3)
+    fx_kind = fx_col1.selectbox("FX path model", ["none", "gbm", "mean_reverting"],
+                                format_func=lambda k: {"none": "PPP forecast × constant shock",
+                                                       "gbm": "GBM around PPP",
+                                                       "mean_reverting": "Mean-reverting around PPP"}[k])
+    fx_model = None
+    if fx_kind != "none":
+        fx_sigma = fx_col2.number_input("FX path volatility σ (%/yr)", value=10.0, step=1.0) / 100.0
+        if fx_kind == "gbm":
+            fx_model = fxm.GBM(fx_sigma)
+        else:
+            half_life = fx_col3.number_input("Half-life of PPP deviations (years)", value=3.0,
+                                             step=0.5, min_value=0.1)
+            fx_model = fxm.MeanReverting(fx_sigma, half_life)
+
+    distributions = {
+        "pi_d": mc.Normal(inputs.pi_d, sd_pi_d),
+        "pi_f": mc.Normal(inputs.pi_f, sd_pi_f),
+        "units_growth": mc.Normal(inputs.units_growth, sd_units_growth),
+        "lost_units_growth": mc.Normal(inputs.lost_units_growth, sd_lost_units_growth),
+        "lost_margin_growth": mc.Normal(inputs.lost_margin_growth, sd_lost_margin_growth),
+        "fx_shock": mc.Normal(0.0, sd_fx),
+    }
+
+    st.markdown("**Variance reduction** (mean APV and P(APV > 0) only)")
+    vr_col1, vr_col2, vr_col3, vr_col4 = st.columns(4)
+    samplers = ["random", "halton"] + (["sobol"] if qmc.have_sobol() else [])
+    vr_sampler = vr_col1.selectbox("Sampling", samplers, index=1,
+                                   format_func=lambda s: {"random": "Pseudo-random", "halton": "Halton (QMC)",
+                                                          "sobol": "Sobol (QMC)"}[s])
+    vr_antithetic = vr_col2.checkbox("Antithetic variates", value=True)
+    vr_control = vr_col3.checkbox("Control variate (deterministic APV)", value=True)
+    vr_paths = vr_col4.number_input("Paths", value=64_000, step=16_000, min_value=2_000)
+    if st.button("📉 Estimate with variance reduction"):
+        vr = qmc.simulate(inputs, n_paths=int(vr_paths), distributions=distributions, seed=int(mc_seed),
+                          sampler=vr_sampler, antithetic=vr_antithetic, control_variate=vr_control,
+                          fx_model=fx_model)
+        v1, v2 = st.columns(2)
+        v1.metric("Mean APV", f"${vr.mean:,.2f}")
+        v1.caption(f"± ${vr.std_error:,.2f} — variance reduced {vr.vrf_mean:,.1f}× "
+                   f"(plain sampling: ± ${vr.naive_std_error:,.2f})")
+        v2.metric("P(APV > 0)", f"{vr.prob_positive:.3%}")
+        v2.caption(f"± {vr.prob_std_error:.3%} — variance reduced {vr.vrf_prob:,.1f}× "
+                   f"(plain sampling: ± {vr.naive_prob_std_error:.3%})")
+        st.caption(f"{vr.n_paths:,} paths in {vr.replicates} independent replicates; a variance "
+                   f"reduction of k× matches plain sampling with k times as many paths.")
+
+    st.markdown("**Full simulation** (every path saved for histograms, percentiles and filters)")
+    if st.button("🎲 Run simulation"):
+        # Paths go to a memory-mapped run on disk (apv_store.py); the session
+        # only keeps its path, and the run can be reopened in later sessions
+        run = store.simulate_to_store(inputs, n_paths=int(n_paths), distributions=distributions,
+                                      seed=int(mc_seed), fx_model=fx_model)
+        st.session_state["mc_run"] = run.path
+        # Oldest runs beyond the retention limits are deleted
+        store.prune_runs(keep=[run.path])
+
+    runs = store.list_runs()
+    if runs:
+        run_paths = [r.path for r in runs]
+        selected = st.session_state.get("mc_run")
+        s_col1, s_col2 = st.columns([4, 1])
+        run_path = s_col1.selectbox(
+            "Stored run", run_paths,
+            index=run_paths.index(selected) if selected in run_paths else 0,
+            format_func=lambda p: f"{os.path.basename(p)} ({len(runs[run_paths.index(p)]):,} paths)")
+        if s_col2.button("🗑️ Delete run"):
+            store.delete_run(run_path)
+            st.session_state.pop("mc_run", None)
+            st.rerun()
+        st.caption(f"Runs are kept in {store.DEFAULT_ROOT}; only the newest "
+                   f"{store.DEFAULT_MAX_RUNS} (up to {store.DEFAULT_MAX_BYTES / 2 ** 30:g} GiB) are kept.")
+        run = store.ResultStore.open(run_path)
+
+        f_col1, f_col2, f_col3, f_col4 = st.columns(4)
+        column = f_col1.selectbox("Show", run.columns, index=run.columns.index("apv"))
+        filter_on = f_col2.selectbox("Filter on", ("(none)",) + run.columns)
+        where = None
+        if filter_on != "(none)":
+            low = f_col3.number_input("from", value=None, key=f"mc_where_{filter_on}_lo")
+            high = f_col4.number_input("to", value=None, key=f"mc_where_{filter_on}_hi")
+            where = {filter_on: (low, high)}
+
+        summary = stored_run_summary(run_path, column, tuple((where or {}).items()))
+        stats = summary["stats"]
+        fmt = "${:,.2f}" if column in COMPONENTS else "{:,.6f}"
+        m1, m2, m3 = st.columns(3)
+        m1.metric(f"Mean {column}", fmt.format(stats["mean"]),
+                  help=f"± {fmt.format(stats['std_error'])} (1 s.e.)")
+        m2.metric(f"P({column} > 0)", f"{stats['prob_positive']:.2%}")
+        m3.metric("Std. deviation", fmt.format(stats["std"]))
+        st.caption(f"{stats['count']:,} of {len(run):,} paths"
+                   + ("" if run.complete else " — run did not finish"))
+
+        import pandas as pd
+
+        counts, edges = summary["histogram"]
+        st.bar_chart(pd.DataFrame({"Paths": counts}, index=np.round((edges[:-1] + edges[1:]) / 2, 0)))
+        st.dataframe(pd.DataFrame(
+            [[f"P{q:g}", v] for q, v in summary["percentiles"].items()],
+            columns=["Percentile", column],
+        ), use_container_width=True)
+        st.caption("First 100 matching paths")
+        st.dataframe(pd.DataFrame(summary["rows"]), use_container_width=True)
+
+with st.expander("🗺️ Two-way sensitivity heatmap"):
+    st.caption("Sweeps two inputs over a grid with all other inputs held at the values above. "
+               "The black line marks APV = 0.")
+    sweep_names = list(sens.SWEEP_INPUTS)
+    base_params = inputs
+
+    def sweep_axis(axis, default_name):
+        name = st.selectbox(f"{axis} input", sweep_names, index=sweep_names.index(default_name),
+                            format_func=sens.axis_label, key=f"sweep_{axis}")
+        scale = 100.0 if name in sens.PERCENT_INPUTS else 1.0
+        low, high = sens.default_range(base_params, name)
+        c_lo, c_hi, c_n = st.columns(3)
+        low = c_lo.number_input(f"{axis} from", value=low * scale, key=f"sweep_{axis}_{name}_lo") / scale
+        high = c_hi.number_input(f"{axis} to", value=high * scale, key=f"sweep_{axis}_{name}_hi") / scale
+        steps = c_n.number_input(f"{axis} points", value=500, min_value=2, max_value=2000,
+                                 key=f"sweep_{axis}_n")
+        return name, sens.grid_axis(name, low, high, steps)
+
+    x_name, x_values = sweep_axis("X", "K_ud")
+    y_name, y_values = sweep_axis("Y", "i_d")
+
+    if st.button("🗺️ Build sensitivity surface"):
+        if x_name == y_name:
+            st.error("Pick two different inputs.")
+        else:
+            grid = sens.sensitivity_grid(base_params, x_name, x_values, y_name, y_values)
+            st.altair_chart(sens.heatmap_chart(grid), use_container_width=True)
+            positive = float((grid.apv > 0).mean())
+            st.markdown(f"**{grid.apv.size:,} grid points** — APV > 0 on {positive:.1%} of the grid; "
+                        f"range ${grid.apv.min():,.2f} to ${grid.apv.max():,.2f}.")
+
+greeks_box = st.expander("📐 APV sensitivities (Greeks)", on_change="rerun", key="greeks")
+with greeks_box:
+    if greeks_box.open:
+        st.caption("Exact partial derivatives of the APV with respect to every input, from one "
+                   "forward-mode pass of the closed-form engine. ΔAPV is the first-order change for "
+                   "+1 percentage point (rates) or +1% of the current value (other inputs).")
+        import pandas as pd
+
+        greek_params = inputs
+        g = gk.greeks([greek_params])
+        rows = []
+        for name in g.inputs:
+            value = getattr(greek_params, name)
+            slope = float(g.d("apv", name)[0])
+            step = 0.01 if name in sens.PERCENT_INPUTS else 0.01 * value
+            rows.append({
+                "Input": sens.axis_label(name),
+                "Current": value * (100.0 if name in sens.PERCENT_INPUTS else 1.0),
+                "∂APV/∂input": slope,
+                "ΔAPV for +1 step ($)": slope * step,
+            })
+        greeks_df = pd.DataFrame(rows).sort_values("ΔAPV for +1 step ($)", key=np.abs, ascending=False)
+        st.dataframe(greeks_df, use_container_width=True, hide_index=True, column_config={
+            "Current": st.column_config.NumberColumn(format="%.4f"),
+            "∂APV/∂input": st.column_config.NumberColumn(format="%.4f"),
+            "ΔAPV for +1 step ($)": st.column_config.NumberColumn(format="%+.2f"),
         })
-    df182 = pd.DataFrame(rows_182)
-
-    # EXHIBIT 18.3 - Depreciation tax shields
-    rows_183 = []
-    pv_dep = 0.0
-    for t in range(1, int(years) + 1):
-        shield_usd = tax * depreciation_eur * S_t(t)   # S_t * τ * D_t
-        pv = shield_usd / ((1 + i_d) ** t)
-        pv_dep += pv
-        rows_183.append({
-            "Year": t,
-            "S_t ($/€)": round(S_t(t), 6),
-            "D_t (€)": round(depreciation_eur, 2),
-            "S_t × τ × D_t ($)": round(shield_usd, 2),
-            "PV @ i_d ($)": round(pv, 2)
+
+with st.expander("🎯 Break-even (APV = 0)"):
+    st.caption("For each input in turn, the value at which APV falls to zero with every other "
+               "input held at the values above (safeguarded Newton on the vectorized engine).")
+    if st.button("🎯 Solve break-even values"):
+        import pandas as pd
+
+        rows = be.break_even_table(inputs)
+        be_df = pd.DataFrame([{
+            "Input": r["label"],
+            "Current": r["current"],
+            "Break-even": r["break_even"],
+            "Change": r["change"] * 100,
+        } for r in rows])
+        st.dataframe(be_df, use_container_width=True, hide_index=True, column_config={
+            "Current": st.column_config.NumberColumn(format="%.4f"),
+            "Break-even": st.column_config.NumberColumn(format="%.4f"),
+            "Change": st.column_config.NumberColumn("Change (%)", format="%+.2f"),
         })
-    df183 = pd.DataFrame(rows_183)
-
-    # EXHIBIT 18.5 - Concessional loan payments (equal principal schedule)
-    rows_185 = []
-    principal_payment = concession_loan_eur / years
-    remaining = concession_loan_eur
-    pv_concess_payments = 0.0
-    for t in range(1, int(years) + 1):
-        interest = remaining * i_c
-        payment_eur = principal_payment + interest
-        payment_usd = payment_eur * S_t(t)
-        pv = payment_usd / ((1 + i_d) ** t)
-        pv_concess_payments += pv
-        rows_185.append({
-            "Year": t,
-            "Remaining (€) start": round(remaining, 2),
-            "Interest (€)": round(interest, 2),
-            "Principal (€)": round(principal_payment, 2),
-            "Payment (€)": round(payment_eur, 2),
-            "S_t ($/€)": round(S_t(t), 6),
-            "Payment (USD)": round(payment_usd, 2),
-            "PV @ i_d (USD)": round(pv, 2)
+        st.caption("Blank rows have no APV = 0 crossing within the input's admissible range.")
+
+offers_box = st.expander("🏦 Compare loan offers", on_change="rerun", key="loan_offers")
+with offers_box:
+    if offers_box.open:
+        st.caption("The concessional loan under other repayment structures, with every other input "
+                   "as above (apv_loans.py). Grace years are interest-only.")
+        o1, o2 = st.columns(2)
+        with o1:
+            offer_grace = st.number_input("Grace years", min_value=0, max_value=max(int(inputs.years) - 1, 0),
+                                          value=0, step=1, key="offer_grace")
+        with o2:
+            offer_rate = st.number_input("Offered loan rate (%)", value=inputs.i_c * 100, step=0.1,
+                                         key="offer_rate") / 100
+        import pandas as pd
+
+        offers = {"Current (equal principal)": {}}
+        for structure in loans.STRUCTURES:
+            label = structure.replace("_", " ")
+            if offer_grace and structure != "bullet":
+                label += f", {offer_grace}y grace"
+            offers[f"{label} at {offer_rate:.2%}"] = {
+                "structure": structure, "grace_years": offer_grace, "i_c": offer_rate}
+        cmp = loans.compare_offers([inputs], offers)
+        offers_df = pd.DataFrame({
+            "Offer": cmp.offers,
+            "Loan benefit ($)": cmp.loan_benefit[0],
+            "Interest shields ($)": cmp.pv_interest_tax[0],
+            "APV ($)": cmp.apv[0],
+            "ΔAPV vs current ($)": cmp.apv[0] - cmp.apv[0, 0],
         })
-        remaining -= principal_payment
-    df185 = pd.DataFrame(rows_185)
-    pv_concess_payments = round(pv_concess_payments, 2)
-    dollar_value_concession_loan = concession_loan_eur * S0
-    loan_benefit = round(dollar_value_concession_loan - pv_concess_payments, 2)
-
-    # EXHIBIT 18.6 - Interest tax shields
-    # Compute lambda from borrowing capacity:
-    # lambda_parent = borrowing_capacity_usd / (project_cost_usd)
-    project_cost_usd = C0_eur * S0
-    lambda_parent = borrowing_capacity_usd / project_cost_usd
-    loan_ratio = concession_loan_eur / C0_eur
-    lambda_project = lambda_parent / loan_ratio
-
-    rows_186 = []
-    remaining = concession_loan_eur
-    pv_interest_tax = 0.0
-    for t in range(1, int(years) + 1):
-        interest = remaining * i_c
-        shield_usd = S_t(t) * interest * lambda_project * tax
-        pv = shield_usd / ((1 + i_d) ** t)
-        pv_interest_tax += pv
-        rows_186.append({
-            "Year": t,
-            "S_t ($/€)": round(S_t(t), 6),
-            "I_t (€)": round(interest, 2),
-            "λ / Project debt ratio": round(lambda_project, 6),
-            "S_t × λ × τ × I_t ($)": round(shield_usd, 2),
-            "PV @ i_d ($)": round(pv, 2)
+        money = st.column_config.NumberColumn(format="%.2f")
+        st.dataframe(offers_df, use_container_width=True, hide_index=True, column_config={
+            "Loan benefit ($)": money, "Interest shields ($)": money, "APV ($)": money,
+            "ΔAPV vs current ($)": st.column_config.NumberColumn(format="%+.2f"),
         })
-        remaining -= principal_payment
-    df186 = pd.DataFrame(rows_186)
-
-    # Freed-up affiliate funds (automatic calculation using affiliate inputs)
-    # affiliate_after_tax_retained is the AFTER-foreign-tax amount in EUR (what the affiliate has on books)
-    gross_eur = affiliate_after_tax_retained / (1 - affiliate_prior_tax_rate)  # gross before foreign tax
-    gross_usd = gross_eur * S0
-    freed_up_usd = round((tax - affiliate_prior_tax_rate) * gross_usd, 2)
-
-    # Final APV
-    pv_operating = round(pv_operating, 2)
-    pv_dep = round(pv_dep, 2)
-    pv_interest_tax = round(pv_interest_tax, 2)
-    initial_invest_usd = round(C0_eur * S0, 2)
-    apv = round(pv_operating + pv_dep + loan_benefit + pv_interest_tax + freed_up_usd - initial_invest_usd, 2)
-
-    # Return everything
-    meta = {
-        "pv_operating": pv_operating,
-        "pv_dep": pv_dep,
-        "pv_concess_payments": pv_concess_payments,
-        "loan_benefit": loan_benefit,
-        "pv_interest_tax": pv_interest_tax,
-        "freed_up_usd": freed_up_usd,
-        "initial_invest_usd": initial_invest_usd,
-        "apv": apv,
-        "lambda_parent": lambda_parent,
-        "lambda_project": lambda_project
-    }
-    return df182, df183, df185, df186, meta
+        st.markdown(f"**Best offer:** {cmp.best()[0]}")
 
-if st.button("📈 Calculate Exhibits & APV"):
-    df182, df183, df185, df186, meta = compute_all()
-
-    st.success("✅ Calculation complete")
-
-    st.subheader("📘 Exhibit — After-Tax Operating Cash Flows")
-    st.dataframe(df182, use_container_width=True)
-
-    st.subheader("📘 Exhibit — Depreciation Tax Shields")
-    st.dataframe(df183, use_container_width=True)
-
-    st.subheader("📘 Exhibit — Concessional Loan Payments & Benefit (PV at i_d)")
-    st.dataframe(df185, use_container_width=True)
-    st.markdown(f"**Dollar value of concessionary loan at S0** = {concession_loan_eur} × {S0} = ${concession_loan_eur * S0:,.2f}")
-    st.markdown(f"**PV of concessional loan payments (discounted at i_d)** = ${meta['pv_concess_payments']:,.2f}")
-    st.markdown(f"**Value (benefit) of concessional financing** = ${meta['loan_benefit']:,.2f}")
-
-    st.subheader("📘 Exhibit — Interest Tax Shields")
-    st.dataframe(df186, use_container_width=True)
-    st.markdown(f"**λ_parent** (borrowing capacity / project USD cost) = {meta['lambda_parent']:.6f}")
-    st.markdown(f"**λ_project** (used in exhibit) = {meta['lambda_project']:.6f}")
-
-    st.divider()
-    st.header("📊 Final APV Summary")
-    summary_df = pd.DataFrame([
-        ["PV (Operating CFs)", meta['pv_operating']],
-        ["PV (Depreciation Shields)", meta['pv_dep']],
-        ["PV (Loan Benefit)", meta['loan_benefit']],
-        ["PV (Interest Shields)", meta['pv_interest_tax']],
-        ["Freed-Up Affiliate Funds", meta['freed_up_usd']],
-        ["Initial Investment (USD)", meta['initial_invest_usd']],
-        ["Final APV", meta['apv']]
-    ], columns=["Component", "Value ($)"])
-    st.dataframe(summary_df, use_container_width=True)
-    st.markdown(f"### 💰 Final APV = **${meta['apv']:,.2f}**")
-
-    
-    st.info("Made with ❤️ by Deepesh Pandey")
+options_box = st.expander("🌳 Real options (abandon / expand)", on_change="rerun", key="real_options")
+with options_box:
+    if options_box.open:
+        st.caption("Options on the project value V0 = PV of operating cash flows, valued on a "
+                   "binomial or trinomial lattice over the project life (apv_options.py). "
+                   "Expanded APV = static APV + value of the options.")
+        r1, r2, r3 = st.columns(3)
+        with r1:
+            opt_vol = st.number_input("Project value volatility (%)", value=30.0, step=1.0,
+                                      min_value=1.0, key="opt_vol") / 100
+            opt_method = st.selectbox("Lattice", ro.METHODS, key="opt_method")
+        with r2:
+            opt_salvage = st.number_input("Salvage value on abandonment ($)", value=0.0,
+                                          step=100_000.0, min_value=0.0, key="opt_salvage")
+            opt_steps = st.number_input("Steps", value=ro.DEFAULT_STEPS, step=100, min_value=10,
+                                        max_value=20_000, key="opt_steps")
+        with r3:
+            opt_expansion = st.number_input("Expansion (% of project scale)", value=0.0, step=5.0,
+                                            min_value=0.0, key="opt_expansion") / 100
+            opt_cost = st.number_input("Expansion cost ($)", value=0.0, step=100_000.0,
+                                       min_value=0.0, key="opt_cost")
+        import pandas as pd
+
+        opt = ro.value_options([inputs], ro.OptionTerms(
+            volatility=opt_vol, salvage=opt_salvage, expansion=opt_expansion,
+            expansion_cost=opt_cost), steps=int(opt_steps), method=opt_method)
+        if not opt.pv_operating[0] > 0:
+            st.warning("The PV of operating cash flows is not positive for these inputs, so the "
+                       "options cannot be valued on a lattice of the project value.")
+        opt_df = pd.DataFrame([
+            ["Base-case project value V0 (PV operating CFs)", opt.pv_operating[0]],
+            ["Static APV", opt.static_apv[0]],
+            ["Abandonment option", opt.abandon[0]],
+            ["Expansion option", opt.expand[0]],
+            ["Both options together", opt.combined[0]],
+            ["Expanded APV", opt.expanded_apv[0]],
+        ], columns=["Component", "Value ($)"])
+        st.dataframe(opt_df, use_container_width=True, hide_index=True,
+                     column_config={"Value ($)": st.column_config.NumberColumn(format="%.2f")})
+
+with st.expander("📦 Export exhibits for a portfolio"):
+    st.caption("Exhibits 18.2, 18.3, 18.5, 18.6 and the Final APV Summary for every project, one "
+               "row per project and year, streamed chunk by chunk (apv_export.py). Upload "
+               "scenarios with APVParams column names (as for apv_runner.py), or export the "
+               "inputs above as a single project.")
+    upload = st.file_uploader("Scenario file (optional)", type=["csv", "parquet"])
+    e1, e2 = st.columns(2)
+    export_fmt = e1.radio("Format", ["xlsx", "parquet"], horizontal=True,
+                          format_func={"xlsx": "Excel workbook", "parquet": "Parquet (zip)"}.get)
+    id_column = e2.text_input("Project id column (optional)", "")
+    if st.button("📦 Build export"):
+        with st.spinner("Writing exhibits…"):
+            try:
+                if upload is not None:
+                    fmt_in = "parquet" if upload.name.lower().endswith(".parquet") else "csv"
+                    st.session_state["apv_export"] = export.export_bytes(
+                        export_fmt, file=upload, input_format=fmt_in, id_column=id_column or None)
+                else:
+                    st.session_state["apv_export"] = export.export_bytes(export_fmt, scenarios=[inputs])
+            except ImportError as exc:
+                st.error(str(exc))
+    built = st.session_state.get("apv_export")
+    if built is not None:
+        data, file_name, mime = built
+        st.download_button(f"⬇️ Download {file_name} ({len(data) / 1024:,.0f} KiB)", data,
+                           file_name=file_name, mime=mime)
+
+apv_profile.stop(profile_token)
+if profiler is not None:
+    with st.expander("⏱️ Performance"):
+        perf = profiler.to_dict()
+        st.caption(f"Script run so far: {perf['wall_ms']:,.1f} ms. Stages that did not run "
+                   "(e.g. exhibits served from the cache) are not listed.")
+        if perf["stages"]:
+            import pandas as pd
 
+            perf_df = pd.DataFrame(perf["stages"]).rename(columns={
+                "stage": "Stage", "ms": "Wall time (ms)", "calls": "Calls", "share": "Share"})
+            st.dataframe(perf_df.style.format({"Wall time (ms)": "{:,.3f}", "Share": "{:.1%}"}),
+                         use_container_width=True, hide_index=True)
+        if perf["counters"]:
+            st.write(perf["counters"])
+        st.download_button("⬇️ Export timings (JSON)", profiler.to_json(),
+                           file_name="apv_profile.json", mime="application/json")
@@ -0,0 +1,261 @@
+# apv_export.py
+# Streaming export of the exhibit tables (18.2, 18.3, 18.5, 18.6) and the
+# Final APV Summary for every project in a portfolio.
+#
+#   python apv_export.py scenarios.csv exhibits.xlsx
+#   python apv_export.py scenarios.parquet exhibits_dir --format parquet --id-column project
+#
+# Projects are valued in chunks with the batch engine (apv_engine.batch_exhibits).
+# Each chunk is written straight out in long format: one row per project and
+# year, tagged with the project id. No per-project DataFrame is built, so
+# memory depends on the chunk size, not on the size of the portfolio.
+#
+# XLSX goes through openpyxl's write-only workbook (pip install openpyxl).
+# A sheet that would pass Excel's row limit continues on "<sheet> (2)", ...
+# Parquet output is a directory holding one dataset per table and one part
+# file per chunk; read a table with pyarrow.parquet.read_table(<dir>/<table>).
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from apv_engine import (
+    APVParams, EXHIBIT_COLUMNS, PARAM_FIELDS, batch_exhibits, exhibit_components, stack_params,
+    total_components,
+)
+from apv_runner import _format, _read_csv, _read_parquet
+
+DEFAULT_CHUNK = 1_000
+FORMATS = ("xlsx", "parquet")
+XLSX_MAX_ROWS = 1_048_576        # per sheet, header row included
+
+# Output tables in sheet order -> sheet title
+TABLES = {
+    "summary": "Final APV Summary",
+    "exhibit_182": "Exhibit 18.2",
+    "exhibit_183": "Exhibit 18.3",
+    "exhibit_185": "Exhibit 18.5",
+    "exhibit_186": "Exhibit 18.6",
+}
+
+SUMMARY_COLUMNS = (
+    ("PV (Operating CFs)", "pv_operating"),
+    ("PV (Depreciation Shields)", "pv_dep"),
+    ("PV (Concessional Loan Payments)", "pv_concess_payments"),
+    ("PV (Loan Benefit)", "loan_benefit"),
+    ("PV (Interest Shields)", "pv_interest_tax"),
+    ("Freed-Up Affiliate Funds", "freed_up_usd"),
+    ("Initial Investment (USD)", "initial_invest_usd"),
+    ("Final APV", "apv"),
+    ("λ_project", "lambda_project"),
+)
+
+PROJECT = "Project"
+
+
+def table_columns(name):
+    """Column labels of an output table, project id first."""
+    spec = SUMMARY_COLUMNS if name == "summary" else EXHIBIT_COLUMNS[name]
+    return (PROJECT,) + tuple(label for label, _ in spec)
+
+
+def chunk_tables(cols, ids):
+    """{table: {label: 1-D array}} for one chunk of stacked columns. The
+    exhibit tables have one row per project and year of its life, ordered by
+    project, then year."""
+    mask, exhibits, p = batch_exhibits(cols)
+    row_ids = np.broadcast_to(np.asarray(ids)[:, None], mask.shape)[mask]
+    tables = {}
+    for name, ex in exhibits.items():
+        table = {PROJECT: row_ids}
+        for label, key in EXHIBIT_COLUMNS[name]:
+            values = np.broadcast_to(ex[key], mask.shape)[mask]
+            table[label] = values.astype(np.int64) if key == "year" else values
+        tables[name] = table
+    totals = total_components(cols, exhibit_components(mask, exhibits, p))
+    tables["summary"] = {PROJECT: np.asarray(ids),
+                         **{label: totals[key] for label, key in SUMMARY_COLUMNS}}
+    return tables
+
+
+# -------------------------------
+# Writers (one chunk of every table at a time)
+# -------------------------------
+class XLSXWriter:
+    def __init__(self, path):
+        try:
+            from openpyxl import Workbook
+        except ImportError as exc:
+            raise ImportError("XLSX export needs openpyxl (pip install openpyxl); "
+                              "use the parquet format otherwise") from exc
+        self.path = path
+        self.book = Workbook(write_only=True)
+        self.sheets = {name: self._sheet(name, title) for name, title in TABLES.items()}
+
+    def _sheet(self, name, title, part=1):
+        sheet = self.book.create_sheet(title if part == 1 else f"{title} ({part})")
+        sheet.append(table_columns(name))
+        return [sheet, 1, part]  # sheet, rows written, part number
+
+    def write(self, name, table):
+        state = self.sheets[name]
+        for row in zip(*(table[label].tolist() for label in table_columns(name))):
+            if state[1] == XLSX_MAX_ROWS:
+                state[:] = self._sheet(name, TABLES[name], state[2] + 1)
+            state[0].append(row)
+            state[1] += 1
+
+    def close(self):
+        self.book.save(self.path)
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from exc
+        self.path = path
+        self.parts = dict.fromkeys(TABLES, 0)
+        self.schemas = {}
+        for name in TABLES:
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+
+    def write(self, name, table):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Every part of a table takes its first part's schema, so the
+        # directory reads back as one dataset
+        part = os.path.join(self.path, name, f"part-{self.parts[name]:05d}.parquet")
+        columns = {label: table[label] for label in table_columns(name)}
+        schema = self.schemas.get(name)
+        if schema is None:
+            data = pa.table(columns)
+            self.schemas[name] = data.schema
+        else:
+            data = pa.table({f.name: pa.array(columns[f.name], type=f.type, from_pandas=True)
+                             for f in schema}, schema=schema)
+        pq.write_table(data, part)
+        self.parts[name] += 1
+
+    def close(self):
+        pass
+
+
+WRITERS = {"xlsx": XLSXWriter, "parquet": ParquetWriter}
+
+
+# -------------------------------
+# Export
+# -------------------------------
+def _portfolio_chunks(scenarios, chunk_size, ids):
+    cols = stack_params(scenarios)
+    n = len(cols["years"])
+    ids = np.arange(1, n + 1) if ids is None else np.asarray(ids)
+    for lo in range(0, n, chunk_size):
+        yield {k: v[lo:lo + chunk_size] for k, v in cols.items()}, ids[lo:lo + chunk_size]
+
+
+def _frame_chunks(frames, id_column):
+    # DataFrames of scenarios, as read by apv_runner; missing fields take the defaults
+    start = 0
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        params = {k: frame[k].to_numpy() for k in PARAM_FIELDS if k in frame.columns}
+        if not params:
+            params = {"years": np.full(len(frame), APVParams().years)}
+        ids = (frame[id_column].to_numpy(dtype=object, na_value=None) if id_column
+               else np.arange(start + 1, start + len(frame) + 1))
+        start += len(frame)
+        yield stack_params(params), ids
+
+
+def write_chunks(chunks, output_path, fmt, log=None):
+    """Write (stacked columns, ids) chunks to ``output_path``; returns stats."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    writer = WRITERS[fmt](output_path)
+    projects, rows, t0 = 0, dict.fromkeys(TABLES, 0), time.perf_counter()
+    for cols, ids in chunks:
+        for name, table in chunk_tables(cols, ids).items():
+            writer.write(name, table)
+            rows[name] += len(table[PROJECT])
+        projects += len(ids)
+        if log:
+            log(f"{projects:,} projects")
+    writer.close()
+    return {"projects": projects, "rows": rows, "seconds": time.perf_counter() - t0}
+
+
+def export(scenarios, output_path, fmt=None, chunk_size=DEFAULT_CHUNK, ids=None, log=None):
+    """Export a portfolio (anything ``stack_params`` accepts) to XLSX or a
+    Parquet directory; ``fmt`` defaults from the output extension."""
+    return write_chunks(_portfolio_chunks(scenarios, chunk_size, ids), output_path,
+                        fmt or _output_format(output_path), log)
+
+
+def export_file(input_path, output_path, fmt=None, chunk_size=DEFAULT_CHUNK, id_column=None,
+                input_format=None, log=None):
+    """Stream a scenario CSV/Parquet file (apv_runner's input layout) into an
+    export. ``input_path`` may be a file object when ``input_format`` is given."""
+    readers = {"csv": _read_csv, "parquet": _read_parquet}
+    frames = readers[_format(input_path, input_format)](input_path, chunk_size)
+    return write_chunks(_frame_chunks(frames, id_column), output_path,
+                        fmt or _output_format(output_path), log)
+
+
+def _output_format(path):
+    return "xlsx" if os.path.splitext(path)[1].lower() == ".xlsx" else "parquet"
+
+
+def export_bytes(fmt="xlsx", scenarios=None, file=None, input_format="csv", id_column=None,
+                 chunk_size=DEFAULT_CHUNK):
+    """(bytes, file name, MIME type) of an export of ``scenarios`` or of an
+    uploaded scenario ``file``, for a download button. The Parquet
+    directory is zipped."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "apv_exhibits.xlsx" if fmt == "xlsx" else "apv_exhibits")
+        if file is not None:
+            export_file(file, path, fmt, chunk_size, id_column, input_format)
+        else:
+            export(scenarios, path, fmt, chunk_size)
+        if fmt == "xlsx":
+            mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        else:
+            path = shutil.make_archive(path, "zip", tmp, "apv_exhibits")
+            mime = "application/zip"
+        with open(path, "rb") as f:
+            return f.read(), os.path.basename(path), mime
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export exhibits and APV summaries for a portfolio.")
+    parser.add_argument("input", help="scenario file (.csv or .parquet)")
+    parser.add_argument("output", help=".xlsx workbook, or a directory for parquet")
+    parser.add_argument("--format", choices=FORMATS, help="default: xlsx for .xlsx outputs, else parquet")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK,
+                        help=f"projects per chunk (default {DEFAULT_CHUNK})")
+    parser.add_argument("--id-column", help="input column identifying each project (default: row number)")
+    parser.add_argument("--input-format", choices=("csv", "parquet"), help="override input format detection")
+    parser.add_argument("--quiet", action="store_true", help="no per-chunk progress on stderr")
+    args = parser.parse_args(argv)
+
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+    try:
+        stats = export_file(args.input, args.output, args.format, args.chunk_size,
+                            args.id_column, args.input_format, log)
+    except ImportError as exc:
+        raise SystemExit(str(exc)) from exc
+    rows = ", ".join(f"{TABLES[k]}: {v:,}" for k, v in stats["rows"].items())
+    print(f"{stats['projects']:,} projects in {stats['seconds']:.2f} s ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
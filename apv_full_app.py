@@ -3,7 +3,8 @@
 # Generic Streamlit App for APV Computation with All Exhibits (18.2–18.6)
 
 import streamlit as st
-import pandas as pd
+from apv_engine import FXPath
+from apv_loans import amortize
 
 st.set_page_config(page_title="APV Calculator", layout="wide")
 
@@ -47,7 +48,10 @@ with col4:
 st.divider()
 
 if st.button("📈 Calculate APV"):
-    def S_t(t): return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    import pandas as pd  # deferred until the exhibits are built
+
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
     depreciation_eur = C0_eur / years
 
     exhibit_182 = []
@@ -81,18 +85,17 @@ if st.button("📈 Calculate APV"):
     pv_dep = round(pv_dep, 2)
     df_183 = pd.DataFrame(exhibit_183, columns=["Year", "Exchange Rate (Sₜ)", "Tax Shield ($)", "PV"])
 
-    principal_payment = concession_loan_eur / years
-    remaining = concession_loan_eur
+    # One schedule, read by Exhibits 18.5 and 18.6
+    loan = amortize(concession_loan_eur, i_c, years)
     exhibit_185 = []
     pv_concess_payments = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        remaining, interest, principal_payment = loan.at(t)
         payment_usd = (principal_payment + interest) * S_t(t)
         pv = payment_usd / ((1 + i_d) ** t)
         pv_concess_payments += pv
         exhibit_185.append([t, round(remaining, 2), round(interest, 2),
                             round(payment_usd, 2), round(pv, 2)])
-        remaining -= principal_payment
     pv_concess_payments = round(pv_concess_payments, 2)
     pv_loan_benefit = round(concession_loan_eur * S0 - pv_concess_payments, 2)
     df_185 = pd.DataFrame(exhibit_185, columns=[
@@ -102,16 +105,14 @@ if st.button("📈 Calculate APV"):
     optimal_debt_ratio = (concession_loan_eur / C0_eur)
     lambda_project = optimal_debt_ratio / 0.40
     exhibit_186 = []
-    remaining = concession_loan_eur
     pv_interest_tax = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        remaining, interest, _ = loan.at(t)
         shield_usd = lambda_project * interest * tax * S_t(t)
         pv = shield_usd / ((1 + i_d) ** t)
         pv_interest_tax += pv
         exhibit_186.append([t, round(remaining, 2), round(interest, 2),
                             round(shield_usd, 2), round(pv, 2)])
-        remaining -= principal_payment
     pv_interest_tax = round(pv_interest_tax, 2)
     df_186 = pd.DataFrame(exhibit_186, columns=[
         "Year", "Remaining Loan (€)", "Interest (€)", "Shield ($)", "PV"
@@ -1,5 +1,6 @@
 import streamlit as st
-import pandas as pd
+from apv_engine import FXPath
+from apv_loans import amortize
 
 st.set_page_config(page_title="APV Calculator with Exhibits", layout="wide")
 st.title("💰 Adjusted Present Value (APV) Calculator — Full Exhibits Edition")
@@ -45,9 +46,10 @@ with col4:
 
 st.divider()
 if st.button("📈 Calculate APV with Full Exhibits"):
+    import pandas as pd  # deferred until the exhibits are built
 
-    def S_t(t):
-        return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
 
     depreciation_eur = C0_eur / years
     initial_invest_usd = S0 * C0_eur
@@ -82,27 +84,24 @@ if st.button("📈 Calculate APV with Full Exhibits"):
         exhibit_183.append([t, round(S_t(t),4), round(depreciation_eur,2), round(pv,2)])
     exhibit_183_df = pd.DataFrame(exhibit_183, columns=["Year", "Sₜ", "Depreciation (€)", "PV($)"])
 
-    principal_payment = concessional_loan_eur / years
-    remaining = concessional_loan_eur
+    # One schedule, read by Exhibits 18.5 and 18.6
+    loan = amortize(concessional_loan_eur, i_c, years)
     pv_concess_payments = 0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, principal_payment = loan.at(t)
         payment_usd = (principal_payment + interest) * S_t(t)
         pv_concess_payments += payment_usd / ((1 + i_d) ** t)
-        remaining -= principal_payment
     dollar_value_concession_loan = concessional_loan_eur * S0
     pv_loan_benefit = dollar_value_concession_loan - pv_concess_payments
 
-    remaining = concessional_loan_eur
     exhibit_186 = []
     pv_interest_tax = 0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, _ = loan.at(t)
         shield_usd = S_t(t) * lambda_ratio * tax * interest
         pv = shield_usd / ((1 + i_d) ** t)
         pv_interest_tax += pv
         exhibit_186.append([t, round(S_t(t),4), round(interest,2), round(lambda_ratio,2), round(shield_usd,2), round(pv,2)])
-        remaining -= principal_payment
     exhibit_186_df = pd.DataFrame(exhibit_186, columns=["Year","Sₜ","Interest (€)","λ/Project Debt","Shield ($)","PV($)"])
 
     gross_value = accumulated_funds_eur / (1 - 0.20)
@@ -0,0 +1,94 @@
+# apv_fx.py
+# Stochastic exchange-rate paths around the PPP forecast.
+#
+# The engine's spot path is the PPP forecast S_t = S0 * ((1+pi_d)/(1+pi_f))^t.
+# The models here draw the real exchange rate's log deviation from that
+# forecast, q_t, for (paths × years) at once, and return the multiplicative
+# factors exp(q_t) that apv_engine applies to the forecast through the
+# ``fx_factor`` hook. Every exhibit (18.2, 18.3, 18.5, 18.6) then reads the
+# stochastic S_t instead of the deterministic one.
+#
+# Deviations are centred so that E[S_t] equals the PPP forecast: the
+# expected cash flows of the base case are unchanged and only real FX risk
+# is added.
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from apv_engine import FXPath, fx_path
+
+
+@dataclass(frozen=True)
+class GBM:
+    """Random-walk real exchange rate: dq_t = sigma dW_t (no reversion).
+
+    ``sigma`` is the annual volatility of log S_t around the PPP forecast.
+    """
+
+    sigma: float
+
+    def factors(self, rng, n, years):
+        T = int(years)
+        steps = self.sigma * rng.standard_normal((n, T))
+        t = np.arange(1, T + 1)
+        return np.exp(np.cumsum(steps, axis=1) - 0.5 * self.sigma ** 2 * t)
+
+
+@dataclass(frozen=True)
+class MeanReverting:
+    """Ornstein-Uhlenbeck real-exchange-rate deviation from PPP.
+
+    A deviation q decays as exp(-kappa t) with kappa = ln 2 / ``half_life``
+    (years), plus noise of instantaneous volatility ``sigma``. It is sampled
+    with the exact annual discretization. ``initial_deviation`` is today's
+    log misalignment log(S0 / PPP fair value). It decays back towards the
+    fair path, so the spot drifts away from the plain PPP forecast.
+    """
+
+    sigma: float
+    half_life: float
+    initial_deviation: float = 0.0
+
+    def __post_init__(self):
+        if not self.half_life > 0:
+            raise ValueError("half_life must be positive (use math.inf for no reversion)")
+
+    def factors(self, rng, n, years):
+        T = int(years)
+        if math.isinf(self.half_life):
+            phi, step_sd = 1.0, self.sigma
+        else:
+            kappa = math.log(2.0) / self.half_life
+            phi = math.exp(-kappa)
+            step_sd = self.sigma * math.sqrt((1.0 - phi ** 2) / (2.0 * kappa))
+
+        q = np.empty((n, T))
+        prev = np.full(n, self.initial_deviation)
+        var, variances = 0.0, np.empty(T)
+        z = rng.standard_normal((n, T))
+        for t in range(T):
+            prev = phi * prev + step_sd * z[:, t]
+            q[:, t] = prev
+            var = phi ** 2 * var + step_sd ** 2
+            variances[t] = var
+        # Relative to the PPP forecast from S0, whose fair value already
+        # includes today's deviation; centred on exp(mean of q_t - q0)
+        return np.exp(q - self.initial_deviation - 0.5 * variances)
+
+
+FX_MODELS = {"gbm": GBM, "mean_reverting": MeanReverting}
+
+
+def simulate_paths(p, model, n_paths, seed=None):
+    """(n_paths, years) FXPath of stochastic spot rates for scenario ``p``.
+
+    The result plugs into ``apv_engine.compute_batch(..., fx=...)`` or, one row
+    at a time, ``apv_engine.compute(p, fx=FXPath(p.S0, path.spot[i]))``.
+    Large runs should go through ``apv_montecarlo.simulate(fx_model=...)``,
+    which values the paths in bounded chunks instead.
+    """
+    rng = np.random.default_rng(seed)
+    base = fx_path(p, p.years)
+    return FXPath(p.S0, base.spot * model.factors(rng, int(n_paths), p.years))
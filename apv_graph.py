@@ -0,0 +1,134 @@
+# apv_graph.py
+# Dependency-tracked, incremental evaluation of the APV exhibits.
+#
+# Each node declares the APVParams fields it reads and the nodes it builds
+# on. A node's cached value is reused as long as those inputs are unchanged
+# and none of its upstream nodes were recomputed, so changing K_ud only
+# rebuilds Exhibit 18.2 (and its table and the summary), changing i_d leaves
+# 18.2 alone, and changing affiliate_prior_tax_rate only touches freed-up
+# funds. Nodes are evaluated lazily: tables nobody asks for are never built.
+
+from dataclasses import dataclass, field
+
+import apv_engine as engine
+from apv_profile import stage
+
+
+@dataclass(frozen=True)
+class Node:
+    inputs: tuple  # APVParams fields read directly
+    deps: tuple    # upstream nodes, passed to fn in this order
+    fn: object     # fn(p, *dep_values)
+    stage: str = None  # apv_profile stage the node is timed under
+
+
+NODES = {
+    "year_axis": Node(("years",), (), lambda p: engine.year_axis(p.years)),
+    "ppp_path": Node(("S0", "pi_d", "pi_f"), ("year_axis",),
+                     lambda p, t: engine.fx_path(p, len(t)).spot, "ppp_path"),
+    "disc_k": Node(("K_ud",), ("year_axis",),
+                   lambda p, t: engine.discount_factors(p.K_ud, t), "exhibit_18_2"),
+    "disc_d": Node(("i_d",), ("year_axis",),
+                   lambda p, t: engine.discount_factors(p.i_d, t), "exhibit_18_3"),
+    "loan_schedule": Node(("concession_loan_eur", "years", "i_c"), ("year_axis",),
+                          lambda p, t: engine.loan_schedule(p, t), "exhibit_18_5"),
+    "debt_ratios": Node(("borrowing_capacity_usd", "C0_eur", "S0", "concession_loan_eur"), (),
+                        lambda p: engine.debt_ratios(p), "exhibit_18_6"),
+    "exhibit_18_2": Node(
+        ("selling_price", "production_cost", "contrib_growth", "units_y1", "units_growth",
+         "lost_units_y1", "lost_units_growth", "lost_margin_usd_y1", "lost_margin_growth", "tax"),
+        ("year_axis", "ppp_path", "disc_k"),
+        engine.exhibit_182, "exhibit_18_2"),
+    "exhibit_18_3": Node(("C0_eur", "years", "tax"), ("year_axis", "ppp_path", "disc_d"),
+                         engine.exhibit_183, "exhibit_18_3"),
+    "exhibit_18_5": Node((), ("year_axis", "ppp_path", "disc_d", "loan_schedule"),
+                         engine.exhibit_185, "exhibit_18_5"),
+    "exhibit_18_6": Node(("tax",), ("year_axis", "ppp_path", "disc_d", "loan_schedule", "debt_ratios"),
+                         lambda p, t, S, d, sched, ratios: engine.exhibit_186(p, t, S, d, sched, ratios[1]),
+                         "exhibit_18_6"),
+    "freed_up_funds": Node(("affiliate_after_tax_retained", "affiliate_prior_tax_rate", "tax", "S0"), (),
+                           engine.freed_up_funds, "freed_up_funds"),
+    "summary": Node(
+        ("concession_loan_eur", "S0", "C0_eur"),
+        ("exhibit_18_2", "exhibit_18_3", "exhibit_18_5", "exhibit_18_6", "freed_up_funds", "debt_ratios"),
+        lambda p, e2, e3, e5, e6, freed, ratios: engine.summary(p, e2, e3, e5, e6, freed, *ratios)),
+    "frame_18_2": Node((), ("exhibit_18_2",), lambda p, e: engine.frame_182(e), "dataframe_build"),
+    "frame_18_3": Node((), ("exhibit_18_3",), lambda p, e: engine.frame_183(e), "dataframe_build"),
+    "frame_18_5": Node((), ("exhibit_18_5",), lambda p, e: engine.frame_185(e), "dataframe_build"),
+    "frame_18_6": Node((), ("exhibit_18_6",), lambda p, e: engine.frame_186(e), "dataframe_build"),
+}
+
+FRAMES = ("frame_18_2", "frame_18_3", "frame_18_5", "frame_18_6")
+
+
+def downstream(fields_changed, nodes=NODES):
+    """Names of every node affected by a change to ``fields_changed``."""
+    changed = set(fields_changed)
+    hit = set()
+    progress = True
+    while progress:
+        progress = False
+        for name, node in nodes.items():
+            if name not in hit and (changed & set(node.inputs) or hit & set(node.deps)):
+                hit.add(name)
+                progress = True
+    return hit
+
+
+@dataclass
+class GraphRun:
+    recomputed: list = field(default_factory=list)
+    reused: list = field(default_factory=list)
+
+
+class APVGraph:
+    """Per-scenario-stream node cache (e.g. one per Streamlit session)."""
+
+    def __init__(self, nodes=NODES):
+        self.nodes = nodes
+        self._cache = {}     # name -> (key, version, value)
+        self._versions = {}  # name -> int, bumped on every recompute
+        self.last_run = None  # GraphRun of the latest evaluate()
+
+    def evaluate(self, params, targets):
+        """Values of ``targets`` for ``params``, recomputing only stale nodes."""
+        run = GraphRun()
+        values = {name: self._get(params, name, run) for name in targets}
+        self.last_run = run
+        return values
+
+    def _get(self, p, name, run):
+        if name in run.recomputed or name in run.reused:
+            return self._cache[name][2]
+        node = self.nodes[name]
+        dep_values = [self._get(p, d, run) for d in node.deps]
+        key = (tuple(getattr(p, f) for f in node.inputs),
+               tuple(self._versions.get(d, 0) for d in node.deps))
+
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            run.reused.append(name)
+            return cached[2]
+
+        if node.stage:
+            with stage(node.stage):
+                value = node.fn(p, *dep_values)
+        else:
+            value = node.fn(p, *dep_values)
+        version = self._versions.get(name, 0) + 1
+        self._versions[name] = version
+        self._cache[name] = (key, version, value)
+        run.recomputed.append(name)
+        return value
+
+    def compute(self, params):
+        """Same result as ``apv_engine.compute``."""
+        v = self.evaluate(params, ("exhibit_18_2", "exhibit_18_3", "exhibit_18_5",
+                                   "exhibit_18_6", "summary"))
+        return engine.APVResult(v["exhibit_18_2"], v["exhibit_18_3"], v["exhibit_18_5"],
+                                v["exhibit_18_6"], v["summary"])
+
+    def compute_all(self, params):
+        """Same return shape as ``apv_engine.compute_all``."""
+        v = self.evaluate(params, FRAMES + ("summary",))
+        return (*(v[f] for f in FRAMES), v["summary"])
@@ -0,0 +1,91 @@
+# apv_inputs.py
+# Shared Streamlit input form for the Centralia APV pages.
+#
+# Every engine-backed page declares its inputs through ``centralia_inputs``
+# instead of re-declaring ~25 number_inputs, so labels, defaults and units
+# (rates entered in %, stored as decimals) stay consistent across pages.
+
+import streamlit as st
+
+from apv_engine import APVParams
+
+
+def _pct(label, value, key):
+    return st.number_input(label, value=value * 100.0, step=0.1, key=key) / 100.0
+
+
+def centralia_inputs(base=None, ppp_price_growth=False, key="apv"):
+    """Render the Centralia input widgets and return them as APVParams.
+
+    ``base`` supplies the defaults (Centralia case if omitted). With
+    ``ppp_price_growth`` the contribution grows at foreign inflation π_f
+    (the PPP assumption) instead of having its own input.
+    """
+    b = base or APVParams()
+
+    st.header("📥 Project & Financial Parameters (inputs)")
+    col1, col2 = st.columns(2)
+    with col1:
+        S0 = st.number_input("Current exchange rate S0 ($/€)", value=b.S0, step=0.01,
+                             format="%.4f", key=f"{key}_S0")
+        pi_f = _pct("Foreign inflation rate π_f (%)", b.pi_f, f"{key}_pi_f")
+        pi_d = _pct("Domestic inflation rate π_d (%)", b.pi_d, f"{key}_pi_d")
+        C0_eur = st.number_input("Initial project cost C0 (EUR)", value=b.C0_eur, step=100_000.0,
+                                 format="%.2f", key=f"{key}_C0_eur")
+        years = st.number_input("Project life (years)", value=int(b.years), step=1, min_value=1,
+                                key=f"{key}_years")
+    with col2:
+        tax = _pct("Corporate tax rate τ (%)", b.tax, f"{key}_tax")
+        K_ud = _pct("Unlevered cost of capital K_ud (%)", b.K_ud, f"{key}_K_ud")
+        i_c = _pct("Concessional loan interest rate i_c (%)", b.i_c, f"{key}_i_c")
+        i_d = _pct("Domestic borrowing / discount rate i_d (%)", b.i_d, f"{key}_i_d")
+        borrowing_capacity_usd = st.number_input("Borrowing capacity (USD)", value=b.borrowing_capacity_usd,
+                                                 step=100_000.0, format="%.2f",
+                                                 key=f"{key}_borrowing_capacity_usd")
+
+    st.divider()
+    st.header("📊 Operating & Market Parameters")
+    col3, col4 = st.columns(2)
+    with col3:
+        units_y1 = st.number_input("Year-1 sales units (EU)", value=b.units_y1, step=100.0,
+                                   key=f"{key}_units_y1")
+        units_growth = _pct("Sales units growth (%)", b.units_growth, f"{key}_units_growth")
+        selling_price = st.number_input("Selling price per unit (€)", value=b.selling_price, step=1.0,
+                                        key=f"{key}_selling_price")
+        production_cost = st.number_input("Production cost per unit (€)", value=b.production_cost, step=1.0,
+                                          key=f"{key}_production_cost")
+        if ppp_price_growth:
+            contrib_growth = pi_f
+        else:
+            contrib_growth = _pct("Contribution (price) growth / euro inflation (%)", b.contrib_growth,
+                                  f"{key}_contrib_growth")
+    with col4:
+        lost_units_y1 = st.number_input("Year-1  export units", value=b.lost_units_y1, step=100.0,
+                                        key=f"{key}_lost_units_y1")
+        lost_units_growth = _pct(" units growth (%)", b.lost_units_growth, f"{key}_lost_units_growth")
+        lost_margin_usd_y1 = st.number_input(" margin per unit (USD) in year1", value=b.lost_margin_usd_y1,
+                                             step=0.1, key=f"{key}_lost_margin_usd_y1")
+        lost_margin_growth = _pct(" margin growth (%)", b.lost_margin_growth, f"{key}_lost_margin_growth")
+        concession_loan_eur = st.number_input("Concessional loan (EUR)", value=b.concession_loan_eur,
+                                              step=100_000.0, key=f"{key}_concession_loan_eur")
+
+    st.divider()
+    st.header("🏦 Affiliate / Tax Details (for Freed-up funds)")
+    affiliate_after_tax_retained = st.number_input(
+        "Affiliate accumulated funds (after foreign tax) (EUR)", value=b.affiliate_after_tax_retained,
+        step=10_000.0, key=f"{key}_affiliate_after_tax_retained")
+    affiliate_prior_tax_rate = _pct("Affiliate prior tax rate (%) (used historically)",
+                                    b.affiliate_prior_tax_rate, f"{key}_affiliate_prior_tax_rate")
+
+    return APVParams(
+        S0=S0, pi_f=pi_f, pi_d=pi_d, C0_eur=C0_eur, years=int(years), tax=tax,
+        K_ud=K_ud, i_c=i_c, i_d=i_d, borrowing_capacity_usd=borrowing_capacity_usd,
+        units_y1=units_y1, units_growth=units_growth,
+        selling_price=selling_price, production_cost=production_cost,
+        contrib_growth=contrib_growth,
+        lost_units_y1=lost_units_y1, lost_units_growth=lost_units_growth,
+        lost_margin_usd_y1=lost_margin_usd_y1, lost_margin_growth=lost_margin_growth,
+        concession_loan_eur=concession_loan_eur,
+        affiliate_after_tax_retained=affiliate_after_tax_retained,
+        affiliate_prior_tax_rate=affiliate_prior_tax_rate,
+    )
@@ -0,0 +1,180 @@
+# apv_loans.py
+# Amortization engine for the concessional loan (Exhibits 18.5 and 18.6).
+#
+# The balance / interest / principal schedule is built once, as arrays over
+# the year axis (and over projects for a portfolio), and both exhibits read
+# the same Schedule. Supported structures:
+#
+#   equal_principal  L / n repaid every year (the Centralia case)
+#   annuity          level payment of principal + interest
+#   bullet           interest only, the whole principal at maturity
+#
+# each optionally after ``grace_years`` of interest-only payments, with the
+# loan maturing at the end of the project's life.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+STRUCTURES = ("equal_principal", "annuity", "bullet")
+
+
+@dataclass(frozen=True)
+class LoanTerms:
+    """Repayment structure per project: ``structure`` is one of STRUCTURES
+    (or an array of them, one per project) and ``grace_years`` a count of
+    interest-only years (scalar or per project)."""
+
+    structure: object = "equal_principal"
+    grace_years: object = 0
+
+    def codes(self):
+        s = np.asarray(self.structure)
+        unknown = set(np.unique(s).tolist()) - set(STRUCTURES)
+        if unknown:
+            raise ValueError(f"Unknown loan structure(s) {sorted(unknown)}; expected one of {STRUCTURES}")
+        if not s.ndim:
+            return STRUCTURES.index(str(s))
+        codes = np.empty(s.shape, dtype=np.int8)
+        for i, name in enumerate(STRUCTURES):
+            codes[s == name] = i
+        return codes
+
+
+class Schedule:
+    """Balance at the start of year t, interest and principal paid in year t.
+
+    Unpacks as ``balance, interest, principal``, the order the exhibits use.
+    """
+
+    __slots__ = ("balance", "interest", "principal")
+
+    def __init__(self, balance, interest, principal):
+        self.balance = balance
+        self.interest = interest
+        self.principal = principal
+
+    def __iter__(self):
+        return iter((self.balance, self.interest, self.principal))
+
+    @property
+    def payment(self):
+        return self.interest + self.principal
+
+    def at(self, t):
+        """(balance, interest, principal) for a 1-based year ``t`` (one project)."""
+        b, i, p = np.broadcast_arrays(self.balance, self.interest, self.principal)
+        return float(b[t - 1]), float(i[t - 1]), float(p[t - 1])
+
+
+def _column(value):
+    # Per-project values become (N, 1) columns that broadcast against t
+    value = np.asarray(value)
+    return value[:, None] if value.ndim == 1 else value
+
+
+def amortize(amount, rate, years, t=None, terms=None):
+    """Schedule of a loan of ``amount`` at ``rate`` maturing after ``years``.
+
+    Arguments are scalars for one loan or (N, 1) columns for a portfolio;
+    ``t`` defaults to years 1..``years``. Without ``terms`` the Centralia
+    equal-principal schedule is returned. Years past maturity (padding in a
+    portfolio batch) have zero balance and payments under ``terms``.
+    """
+    if t is None:
+        t = np.arange(1, int(years) + 1, dtype=np.float64)
+    if terms is None:
+        principal = (amount / years) * np.ones_like(t)
+        remaining = amount - principal * (t - 1)
+        return Schedule(remaining, remaining * rate, principal)
+
+    code = _column(terms.codes())
+    grace = _column(np.asarray(terms.grace_years, dtype=np.float64))
+    amortizing = code != STRUCTURES.index("bullet")
+    if np.any(amortizing & (grace >= years)) or np.any(grace < 0):
+        raise ValueError("grace_years must be between 0 and the project life minus one")
+
+    n = years - grace                 # amortizing years
+    k = t - grace                     # year of amortization (<= 0 during grace)
+    live = t <= years
+
+    # Equal principal after the grace period
+    ep_principal = np.where(k >= 1, amount / n, 0.0)
+    ep_balance = np.where(k >= 1, amount - (amount / n) * (k - 1), amount)
+
+    # Level annuity: B_k = L ((1+i)^n - (1+i)^(k-1)) / ((1+i)^n - 1); at a zero
+    # rate it is equal principal
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + rate) ** n
+        kk = np.maximum(k, 1)
+        an_balance = amount * (growth - (1 + rate) ** (kk - 1)) / (growth - 1)
+        an_next = amount * (growth - (1 + rate) ** kk) / (growth - 1)
+    zero_rate = np.asarray(rate) == 0
+    an_balance = np.where(zero_rate, ep_balance, np.where(k >= 1, an_balance, amount))
+    an_principal = np.where(zero_rate, ep_principal, np.where(k >= 1, an_balance - an_next, 0.0))
+
+    # Bullet: full balance outstanding until maturity
+    bl_balance = amount * np.ones_like(k)
+    bl_principal = np.where(t == years, amount, 0.0)
+
+    choice = [code == 0, code == 1]
+    balance = np.where(live, np.select(choice, [ep_balance, an_balance], bl_balance), 0.0)
+    principal = np.where(live, np.select(choice, [ep_principal, an_principal], bl_principal), 0.0)
+    return Schedule(balance, balance * rate, principal)
+
+
+# -------------------------------
+# Offer comparison
+# -------------------------------
+@dataclass
+class OfferComparison:
+    offers: tuple                # offer names, one column each
+    apv: np.ndarray              # (projects, offers)
+    loan_benefit: np.ndarray
+    pv_interest_tax: np.ndarray
+
+    def best(self):
+        """Name of the highest-APV offer for every project."""
+        return np.array(self.offers)[self.apv.argmax(axis=1)]
+
+    def frame(self):
+        import pandas as pd
+
+        cols = {}
+        for j, name in enumerate(self.offers):
+            cols[f"{name}: APV"] = self.apv[:, j]
+            cols[f"{name}: loan benefit"] = self.loan_benefit[:, j]
+            cols[f"{name}: interest shields"] = self.pv_interest_tax[:, j]
+        cols["best offer"] = self.best()
+        return pd.DataFrame(cols)
+
+
+def compare_offers(scenarios, offers):
+    """Value every project under each loan offer in one batch per offer.
+
+    ``offers`` maps a name to a dict of ``structure`` / ``grace_years`` plus
+    any APVParams overrides of the offer (e.g. ``i_c``,
+    ``concession_loan_eur``), scalars or per-project arrays:
+
+        compare_offers(projects, {
+            "current": {},
+            "annuity 5%": {"structure": "annuity", "i_c": 0.05},
+            "bullet": {"structure": "bullet", "grace_years": 0},
+        })
+    """
+    import apv_engine as engine
+
+    base = engine.stack_params(scenarios)
+    n = len(base["years"])
+    results = {k: [] for k in ("apv", "loan_benefit", "pv_interest_tax")}
+    for spec in offers.values():
+        spec = dict(spec)
+        terms = LoanTerms(spec.pop("structure", "equal_principal"), spec.pop("grace_years", 0))
+        engine._check_fields(spec)
+        cols = dict(base)
+        for k, v in spec.items():
+            cols[k] = np.broadcast_to(np.asarray(v, dtype=base[k].dtype), (n,))
+        out = engine.total_components(cols, engine.batch_components(cols, loan=terms))
+        for k in results:
+            results[k].append(out[k])
+    return OfferComparison(tuple(offers), *(np.column_stack(results[k]) for k in results))
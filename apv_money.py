@@ -0,0 +1,94 @@
+# apv_money.py
+# Exact money mode: amounts carried as int64 cents.
+#
+# Every exhibit's per-year PV is rounded to whole cents at the exhibit
+# boundary (round half away from zero, applied to the exact binary value of
+# the float). Everything after that is integer arithmetic: the exhibit
+# totals, the loan benefit and the APV are sums of int64 cents. The result
+# therefore does not depend on summation order, chunking or batch
+# composition, and the loop and vectorized paths give the same cents.
+# The only exception is a year whose PV differs between the paths by float
+# error straddling a half cent.
+#
+# The default float mode (apv_engine) is unchanged and keeps full precision.
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+from apv_engine import batch_exhibit_pvs, freed_up_funds, stack_params
+
+SCALE = 100                    # cents per dollar
+MAX_DOLLARS = 2.0 ** 53 / SCALE  # beyond this a float no longer resolves cents
+
+
+def to_cents(x):
+    """Round dollar amounts to int64 cents, half away from zero."""
+    x = np.asarray(x, dtype=np.float64)
+    if not np.all(np.isfinite(x)) or np.any(np.abs(x) >= MAX_DOLLARS):
+        raise OverflowError(f"Amounts must be finite and below ${MAX_DOLLARS:,.0f} in money mode")
+    scaled = np.abs(x) * SCALE
+    cents = np.atleast_1d(np.floor(scaled + 0.5))
+    # x * 100 is itself rounded, so a product landing exactly on a half cent
+    # may come from a value just below or above it: settle those exactly
+    ties = np.atleast_1d(scaled - np.floor(scaled) == 0.5)
+    if ties.any():
+        cents[ties] = [float((Decimal(v) * SCALE).to_integral_value(ROUND_HALF_UP))
+                       for v in np.abs(np.atleast_1d(x)[ties]).tolist()]
+    return np.copysign(cents.reshape(x.shape), x).astype(np.int64)
+
+
+def from_cents(cents):
+    """Float dollars (for charts and comparisons; exact up to ~$90 trillion)."""
+    return np.asarray(cents, dtype=np.int64) / SCALE
+
+
+def format_cents(cents):
+    """'$1,234.56' without passing through float."""
+    cents = int(cents)
+    dollars, rest = divmod(abs(cents), SCALE)
+    return f"{'-' if cents < 0 else ''}${dollars:,}.{rest:02d}"
+
+
+def exact_totals(loan_usd, initial_usd, pv, freed_up_usd):
+    """COMPONENTS in int64 cents from the four exhibit totals ``pv`` (cents)
+    and the float loan value at S0, project cost and freed-up funds."""
+    loan_benefit = to_cents(loan_usd) - pv["pv_concess_payments"]
+    initial_invest = to_cents(initial_usd)
+    freed_up = to_cents(freed_up_usd)
+    apv = (pv["pv_operating"] + pv["pv_dep"] + loan_benefit + pv["pv_interest_tax"]
+           + freed_up - initial_invest)
+    return {
+        "pv_operating": pv["pv_operating"],
+        "pv_dep": pv["pv_dep"],
+        "pv_concess_payments": pv["pv_concess_payments"],
+        "loan_benefit": loan_benefit,
+        "pv_interest_tax": pv["pv_interest_tax"],
+        "freed_up_usd": freed_up,
+        "initial_invest_usd": initial_invest,
+        "apv": apv,
+    }
+
+
+def exact_components(cols, fx_factor=None, fx=None, loan=None):
+    """``total_components`` in int64 cents for stacked columns."""
+    mask, pvs, p = batch_exhibit_pvs(cols, fx_factor, fx, loan)
+    pv = {k: to_cents(np.where(mask, v, 0.0)).sum(axis=1) for k, v in pvs.items()}
+    return exact_totals(cols["concession_loan_eur"] * cols["S0"], cols["C0_eur"] * cols["S0"],
+                        pv, freed_up_funds(p)[:, 0])
+
+
+def compute_batch_exact(scenarios, fx=None, loan=None):
+    """``apv_engine.compute_batch`` in exact money mode: a dict of length-N
+    int64 cent arrays keyed by COMPONENTS."""
+    return exact_components(stack_params(scenarios), fx=fx, loan=loan)
+
+
+def exact_result(p, result):
+    """COMPONENTS in cents for one ``apv_engine.compute`` result of ``p``,
+    from its per-year exhibit columns."""
+    pv = {k: int(to_cents(ex["pv"]).sum()) for k, ex in (
+        ("pv_operating", result.exhibit_182), ("pv_dep", result.exhibit_183),
+        ("pv_concess_payments", result.exhibit_185), ("pv_interest_tax", result.exhibit_186))}
+    out = exact_totals(p.concession_loan_eur * p.S0, p.C0_eur * p.S0, pv, freed_up_funds(p))
+    return {k: int(v) for k, v in out.items()}
@@ -0,0 +1,365 @@
+# apv_montecarlo.py
+# Monte Carlo simulation of the Centralia APV over inflation, FX and volume
+# assumptions. Paths are valued in vectorized chunks with the batch engine so
+# memory stays within a fixed budget however many paths are requested.
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from apv_engine import (
+    APVParams, batch_apv, batch_components, stack_params, total_components,
+)
+
+
+# -------------------------------
+# Distributions
+# -------------------------------
+# ``sample`` draws pseudo-random values; ``ppf`` maps uniforms in (0, 1) to
+# the distribution (inverse CDF) for quasi-random and antithetic sampling,
+# see apv_qmc.py. ``mean`` is the exact expectation.
+@dataclass(frozen=True)
+class Normal:
+    mean: float
+    sd: float
+
+    def sample(self, rng, n):
+        return rng.normal(self.mean, self.sd, n)
+
+    def ppf(self, u):
+        return self.mean + self.sd * norm_ppf(u)
+
+
+@dataclass(frozen=True)
+class Uniform:
+    low: float
+    high: float
+
+    def sample(self, rng, n):
+        return rng.uniform(self.low, self.high, n)
+
+    def ppf(self, u):
+        return self.low + (self.high - self.low) * u
+
+    @property
+    def mean(self):
+        return 0.5 * (self.low + self.high)
+
+
+@dataclass(frozen=True)
+class Triangular:
+    low: float
+    mode: float
+    high: float
+
+    def sample(self, rng, n):
+        return rng.triangular(self.low, self.mode, self.high, n)
+
+    def ppf(self, u):
+        width = self.high - self.low
+        split = (self.mode - self.low) / width if width else 0.0
+        left = self.low + np.sqrt(u * width * (self.mode - self.low))
+        right = self.high - np.sqrt((1.0 - u) * width * (self.high - self.mode))
+        return np.where(u < split, left, right)
+
+    @property
+    def mean(self):
+        return (self.low + self.mode + self.high) / 3.0
+
+
+@dataclass(frozen=True)
+class Fixed:
+    value: float
+
+    def sample(self, rng, n):
+        return np.full(n, self.value, dtype=np.float64)
+
+    def ppf(self, u):
+        return np.full(np.shape(u), self.value, dtype=np.float64)
+
+    @property
+    def mean(self):
+        return self.value
+
+
+# Acklam's rational approximation of the standard normal inverse CDF
+# (relative error < 1.2e-9), so QMC sampling does not need scipy
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01, 1.0)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00, 1.0)
+_PPF_TAIL = 0.02425
+
+
+def norm_ppf(u):
+    """Standard normal quantile of ``u`` in (0, 1)."""
+    u = np.asarray(u, dtype=np.float64)
+    out = np.empty_like(u)
+    low, high = u < _PPF_TAIL, u > 1.0 - _PPF_TAIL
+    mid = ~(low | high)
+
+    q = u[mid] - 0.5
+    r = q * q
+    out[mid] = q * np.polyval(_PPF_A, r) / np.polyval(_PPF_B, r)
+    tail = np.sqrt(-2.0 * np.log(np.where(low, u, 1.0 - u)[low | high]))
+    x = np.polyval(_PPF_C, tail) / np.polyval(_PPF_D, tail)
+    out[low | high] = np.where(low[low | high], x, -x)
+    return out
+
+
+# Inputs that can be drawn. "fx_shock" is a log shock applied to the whole
+# PPP spot path S_t (t >= 1); S0 is observed today and stays fixed.
+SIMULATED_INPUTS = (
+    "pi_d", "pi_f", "units_growth", "lost_units_growth", "lost_margin_growth",
+    "fx_shock",
+)
+
+
+def default_distributions(base=None):
+    """Normal draws centred on the base case for every simulated input."""
+    base = base or APVParams()
+    return {
+        "pi_d": Normal(base.pi_d, 0.005),
+        "pi_f": Normal(base.pi_f, 0.005),
+        "units_growth": Normal(base.units_growth, 0.03),
+        "lost_units_growth": Normal(base.lost_units_growth, 0.02),
+        "lost_margin_growth": Normal(base.lost_margin_growth, 0.01),
+        "fx_shock": Normal(0.0, 0.10),
+    }
+
+
+# -------------------------------
+# Simulation
+# -------------------------------
+DEFAULT_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+# Rough count of float64 (path, year) temporaries alive in one batch_apv call
+_ARRAYS_PER_PATH_YEAR = 48
+
+# Bins of the streaming quantile histogram used when paths are not kept
+SKETCH_BINS = 1 << 16
+
+
+@dataclass
+class MonteCarloResult:
+    n_paths: int
+    mean: float
+    std: float
+    std_error: float
+    prob_positive: float
+    percentiles: dict
+    apv: np.ndarray = field(default=None, repr=False)
+
+    def summary(self):
+        return {
+            "n_paths": self.n_paths,
+            "mean": self.mean,
+            "std": self.std,
+            "std_error": self.std_error,
+            "prob_positive": self.prob_positive,
+            **{f"p{q:g}": v for q, v in self.percentiles.items()},
+        }
+
+
+def chunk_size_for(years, memory_budget_mb):
+    per_path = int(years) * 8 * _ARRAYS_PER_PATH_YEAR
+    return max(1, int(memory_budget_mb * 2 ** 20) // per_path)
+
+
+def draw_inputs(base, distributions, rng, n):
+    """Sample the simulated inputs for ``n`` paths (missing ones stay at base)."""
+    unknown = set(distributions) - set(SIMULATED_INPUTS)
+    if unknown:
+        raise ValueError(f"Cannot simulate input(s): {sorted(unknown)}")
+    return {k: dist.sample(rng, n) for k, dist in distributions.items()}
+
+
+def _path_columns(base, draws, n, fx_factor=None):
+    draws = dict(draws)
+    fx_shock = draws.pop("fx_shock", None)
+    cols = stack_params({**base.to_dict(), **draws, "S0": np.full(n, base.S0)})
+    if fx_shock is not None:
+        shock = np.exp(fx_shock)[:, None]
+        fx_factor = shock if fx_factor is None else fx_factor * shock
+    return cols, fx_factor
+
+
+def value_paths(base, draws, n, fx_factor=None):
+    """APV of ``n`` paths given a dict of drawn inputs (each of length n).
+
+    ``fx_factor`` optionally multiplies each path's PPP spot path, e.g. the
+    (n, years) factors of an apv_fx model.
+    """
+    return batch_apv(*_path_columns(base, draws, n, fx_factor))
+
+
+def path_components(base, draws, n, fx_factor=None):
+    """APV and every component PV of ``n`` paths (see ``compute_batch``)."""
+    cols, fx_factor = _path_columns(base, draws, n, fx_factor)
+    return total_components(cols, batch_components(cols, fx_factor))
+
+
+def draw_fx(fx_model, rng, n, years):
+    # (n, years) spot-path factors of an apv_fx model, or None
+    return None if fx_model is None else fx_model.factors(rng, n, years)
+
+
+def simulate(base=None, n_paths=1_000_000, distributions=None, seed=None,
+             memory_budget_mb=256, percentiles=DEFAULT_PERCENTILES, keep_paths=True,
+             fx_model=None):
+    """Run the APV over ``n_paths`` random assumption sets.
+
+    Paths are processed in chunks sized so the (chunk × years) work arrays fit
+    in ``memory_budget_mb``. With ``keep_paths`` the full APV distribution is
+    returned (8 bytes per path). Without it nothing grows with ``n_paths``:
+    moments are merged chunk by chunk and percentiles come from a streaming
+    histogram (see StreamingSummary).
+    ``fx_model`` (see apv_fx.py) adds a stochastic real exchange rate around
+    each path's PPP forecast.
+
+    Each chunk draws all of its inputs in turn, so the paths for a given
+    ``seed`` also depend on the chunk size, i.e. on ``memory_budget_mb``.
+    """
+    if int(n_paths) < 1:
+        raise ValueError("Need at least 1 path")
+    base = base or APVParams()
+    if distributions is None:
+        distributions = default_distributions(base)
+    rng = np.random.default_rng(seed)
+    chunk = chunk_size_for(base.years, memory_budget_mb)
+
+    apv = np.empty(int(n_paths), dtype=np.float64) if keep_paths else StreamingSummary()
+    for start in range(0, int(n_paths), chunk):
+        n = min(chunk, int(n_paths) - start)
+        draws = draw_inputs(base, distributions, rng, n)
+        values = value_paths(base, draws, n, draw_fx(fx_model, rng, n, base.years))
+        if keep_paths:
+            apv[start:start + n] = values
+        else:
+            apv.add(values)
+
+    return summarize(apv, percentiles) if keep_paths else apv.result(percentiles)
+
+
+def summarize(apv, percentiles=DEFAULT_PERCENTILES, keep_paths=True):
+    n = apv.size
+    std = float(apv.std(ddof=1)) if n > 1 else 0.0
+    qs = np.percentile(apv, percentiles)
+    return MonteCarloResult(
+        n_paths=n,
+        mean=float(apv.mean()),
+        std=std,
+        std_error=std / float(np.sqrt(n)),
+        prob_positive=float((apv > 0).mean()),
+        percentiles={q: float(v) for q, v in zip(percentiles, qs)},
+        apv=apv if keep_paths else None,
+    )
+
+
+class StreamingSummary:
+    """Running mean / variance (merged per chunk, Chan et al.) and a
+    fixed-size histogram for percentiles, so memory does not depend on the
+    number of paths.
+
+    The histogram's range is set by the first chunk and doubles, merging
+    bin pairs, whenever a later value falls outside it. Percentiles are
+    interpolated within a bin, so they are accurate to one bin width
+    (range / ``bins``).
+    """
+
+    def __init__(self, bins=SKETCH_BINS):
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.lo = self.width = None
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.positive = self.nonfinite = 0
+        self.min, self.max = np.inf, -np.inf
+
+    def add(self, x):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if not x.size:
+            return
+        k, mu = x.size, float(x.mean())
+        delta = mu - self.mean
+        self.m2 += float(((x - mu) ** 2).sum()) + delta ** 2 * self.n * k / (self.n + k)
+        self.mean += delta * k / (self.n + k)
+        self.n += k
+        self.positive += int((x > 0).sum())
+
+        finite = x[np.isfinite(x)]
+        self.nonfinite += k - finite.size
+        if not finite.size:
+            return
+        low, high = float(finite.min()), float(finite.max())
+        self.min, self.max = min(self.min, low), max(self.max, high)
+        self._cover(low, high)
+        idx = ((finite - self.lo) / self.width).astype(np.int64)
+        self.counts += np.bincount(np.clip(idx, 0, len(self.counts) - 1), minlength=len(self.counts))
+
+    def _cover(self, low, high):
+        bins = len(self.counts)
+        if self.lo is None:
+            self.lo = low
+            self.width = (high - low) / bins or max(abs(low), 1.0) / bins
+        while low < self.lo or high > self.lo + bins * self.width:
+            # Double the bin width: bin pairs merge into one half, the other half is new range
+            merged = self.counts.reshape(-1, 2).sum(axis=1)
+            self.counts[:] = 0
+            if low < self.lo:
+                self.counts[bins // 2:] = merged
+                self.lo -= bins * self.width
+            else:
+                self.counts[:bins // 2] = merged
+            self.width *= 2.0
+
+    def merge(self, other):
+        """Fold in another summary (e.g. from a worker process). Its bins
+        are re-binned at their centres, so percentiles stay accurate to the
+        wider of the two bin widths."""
+        if not other.n:
+            return self
+        k, delta = other.n, other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.n * k / (self.n + k)
+        self.mean += delta * k / (self.n + k)
+        self.n += k
+        self.positive += other.positive
+        self.nonfinite += other.nonfinite
+        if other.lo is None:
+            return self
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        filled = np.flatnonzero(other.counts)
+        centres = other.lo + (filled + 0.5) * other.width
+        self._cover(float(centres.min()), float(centres.max()))
+        idx = ((centres - self.lo) / self.width).astype(np.int64)
+        np.add.at(self.counts, np.clip(idx, 0, len(self.counts) - 1), other.counts[filled])
+        return self
+
+    def quantiles(self, percentiles=DEFAULT_PERCENTILES):
+        if not self.n or self.nonfinite:
+            return {q: float("nan") for q in percentiles}
+        cum = np.cumsum(self.counts)
+        out = {}
+        for q in percentiles:
+            # np.percentile's linear rule: rank q (n - 1), interpolated within its bin
+            r = q / 100.0 * (self.n - 1)
+            b = int(np.searchsorted(cum, r, side="right"))
+            before = cum[b - 1] if b else 0
+            v = self.lo + (b + (r - before + 0.5) / self.counts[b]) * self.width
+            out[q] = float(min(max(v, self.min), self.max))
+        return out
+
+    def result(self, percentiles=DEFAULT_PERCENTILES):
+        if not self.n:
+            raise ValueError("No paths added")
+        std = (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+        return MonteCarloResult(
+            n_paths=self.n,
+            mean=self.mean,
+            std=std,
+            std_error=std / float(np.sqrt(self.n)),
+            prob_positive=self.positive / self.n,
+            percentiles=self.quantiles(percentiles),
+        )
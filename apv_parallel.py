@@ -0,0 +1,214 @@
+# apv_parallel.py
+# Process-pool execution for large scenario batches and Monte Carlo runs.
+#
+# Inputs are packed once into a multiprocessing.shared_memory block that every
+# worker maps read-only; workers write their shard of the output into a second
+# shared block. Only block names and slice bounds cross the process boundary,
+# never the arrays themselves.
+#
+# Work is split into fixed-size shards (not one shard per worker) and each
+# Monte Carlo shard draws from its own SeedSequence child, so results are
+# identical whatever the worker count.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import apv_montecarlo as mc
+from apv_closed_form import closed_form_components
+from apv_engine import (
+    APVParams, PARAM_FIELDS, batch_components, total_components, stack_params,
+)
+
+DEFAULT_SHARD_SIZE = 250_000
+
+# Rows of the batch output block, in order
+_OUTPUT_ROWS = (
+    "pv_operating", "pv_dep", "pv_concess_payments", "pv_interest_tax",
+    "freed_up_usd", "lambda_project",
+)
+
+_KERNELS = {
+    "schedule": batch_components,
+    "closed_form": closed_form_components,
+}
+
+
+@contextmanager
+def _shared_array(shape):
+    # float64 array backed by a fresh shared memory block, unlinked on exit
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    try:
+        yield shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@contextmanager
+def _attach(name, shape):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        yield np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    finally:
+        shm.close()
+
+
+def _shards(n, shard_size):
+    return [(start, min(start + shard_size, n)) for start in range(0, n, shard_size)]
+
+
+def _default_workers():
+    return os.cpu_count() or 1
+
+
+# -------------------------------
+# Portfolio batches
+# -------------------------------
+def _batch_shard(in_name, in_shape, out_name, out_shape, start, stop, method):
+    with _attach(in_name, in_shape) as inputs, _attach(out_name, out_shape) as outputs:
+        cols = {k: inputs[i, start:stop] for i, k in enumerate(PARAM_FIELDS)}
+        cols["years"] = cols["years"].astype(np.int64)
+        c = _KERNELS[method](cols)
+        for i, k in enumerate(_OUTPUT_ROWS):
+            outputs[i, start:stop] = c[k]
+    return stop - start
+
+
+def run_batch_parallel(scenarios, workers=None, shard_size=DEFAULT_SHARD_SIZE,
+                       method="schedule"):
+    """``apv_engine.compute_batch`` sharded across a process pool.
+
+    ``method`` picks the kernel: ``"schedule"`` (explicit year-by-year
+    exhibits) or ``"closed_form"``.
+    """
+    if method not in _KERNELS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {sorted(_KERNELS)}")
+    cols = stack_params(scenarios)
+    n = len(cols["S0"])
+    in_shape, out_shape = (len(PARAM_FIELDS), n), (len(_OUTPUT_ROWS), n)
+
+    with _shared_array(in_shape) as (shm_in, inputs), _shared_array(out_shape) as (shm_out, outputs):
+        for i, k in enumerate(PARAM_FIELDS):
+            inputs[i] = cols[k]
+        with ProcessPoolExecutor(max_workers=workers or _default_workers()) as pool:
+            futures = [
+                pool.submit(_batch_shard, shm_in.name, in_shape, shm_out.name, out_shape,
+                            start, stop, method)
+                for start, stop in _shards(n, shard_size)
+            ]
+            for f in futures:
+                f.result()
+        components = {k: outputs[i].copy() for i, k in enumerate(_OUTPUT_ROWS)}
+
+    return total_components(cols, components)
+
+
+# -------------------------------
+# Monte Carlo
+# -------------------------------
+def _simulate_shard(out_name, n_paths, start, stop, base_dict, distributions, seed_seq,
+                    memory_budget_mb, fx_model):
+    # Writes the shard's APVs into the shared block ``out_name``; with no
+    # block, returns a StreamingSummary of them instead
+    base = APVParams(**base_dict)
+    rng = np.random.default_rng(seed_seq)
+    chunk = mc.chunk_size_for(base.years, memory_budget_mb)
+
+    def values():
+        for lo in range(start, stop, chunk):
+            n = min(chunk, stop - lo)
+            draws = mc.draw_inputs(base, distributions, rng, n)
+            yield lo, mc.value_paths(base, draws, n, mc.draw_fx(fx_model, rng, n, base.years))
+
+    if out_name is None:
+        summary = mc.StreamingSummary()
+        for _, v in values():
+            summary.add(v)
+        return summary
+    with _attach(out_name, (n_paths,)) as apv:
+        for lo, v in values():
+            apv[lo:lo + len(v)] = v
+    return stop - start
+
+
+def simulate_parallel(base=None, n_paths=1_000_000, distributions=None, seed=None,
+                      workers=None, shard_size=DEFAULT_SHARD_SIZE, memory_budget_mb=128,
+                      percentiles=mc.DEFAULT_PERCENTILES, keep_paths=True, fx_model=None):
+    """``apv_montecarlo.simulate`` sharded across a process pool.
+
+    Shard k always draws from ``SeedSequence(seed).spawn(...)[k]``, so a given
+    (seed, shard_size) reproduces the same paths on 1 or 64 workers. The
+    stream differs from the single-process ``simulate`` with the same seed.
+    ``memory_budget_mb`` applies per worker. Without ``keep_paths`` no
+    n_paths-sized array is allocated: each shard returns a StreamingSummary
+    and the parent merges them in shard order.
+    """
+    base = base or APVParams()
+    if distributions is None:
+        distributions = mc.default_distributions(base)
+    n_paths = int(n_paths)
+    if n_paths < 1:
+        raise ValueError("Need at least 1 path")
+    shards = _shards(n_paths, shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+
+    def run(out_name):
+        with ProcessPoolExecutor(max_workers=workers or _default_workers()) as pool:
+            futures = [
+                pool.submit(_simulate_shard, out_name, n_paths, start, stop, base.to_dict(),
+                            distributions, seed_seq, memory_budget_mb, fx_model)
+                for (start, stop), seed_seq in zip(shards, seeds)
+            ]
+            return [f.result() for f in futures]
+
+    if not keep_paths:
+        summary = mc.StreamingSummary()
+        for shard in run(None):
+            summary.merge(shard)
+        return summary.result(percentiles)
+
+    with _shared_array((n_paths,)) as (shm, apv):
+        run(shm.name)
+        result = mc.summarize(apv, percentiles, keep_paths=False)
+        result.apv = apv.copy()
+    return result
+
+
+# -------------------------------
+# Scaling
+# -------------------------------
+def scaling_report(run, worker_counts=(1, 2, 4, 8), repeat=1):
+    """Time ``run(workers)`` for each worker count.
+
+    Returns one dict per count with wall seconds (best of ``repeat``),
+    speedup over the first count and parallel efficiency (speedup / ratio
+    of worker counts).
+    """
+    rows = []
+    for workers in worker_counts:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            run(workers)
+            best = min(best, time.perf_counter() - t0)
+        rows.append({"workers": workers, "seconds": best})
+
+    base = rows[0]
+    for row in rows:
+        row["speedup"] = base["seconds"] / row["seconds"]
+        row["efficiency"] = row["speedup"] / (row["workers"] / base["workers"])
+    return rows
+
+
+if __name__ == "__main__":
+    import json
+
+    n = 2_000_000
+    report = scaling_report(lambda w: simulate_parallel(n_paths=n, seed=0, workers=w),
+                            worker_counts=sorted({1, 2, _default_workers()}))
+    print(json.dumps({"n_paths": n, "cpu_count": _default_workers(), "scaling": report}, indent=2))
@@ -0,0 +1,120 @@
+# apv_profile.py
+# Lightweight stage timing for calculation runs.
+#
+# Code marks its stages with ``with stage("exhibit_18_2"): ...``. Nothing is
+# recorded unless a Profiler has been activated for the current thread /
+# context, so the markers cost one ContextVar lookup when profiling is off.
+# Each Streamlit session runs in its own thread, so concurrent users never
+# see each other's timings.
+#
+# Profiling is switched on with APV_PROFILE=1 or, in the apps, with the
+# ``?profile=1`` query parameter.
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Stages recorded by the engine and the apps, in display order
+STAGES = (
+    "ppp_path",
+    "exhibit_18_2",
+    "exhibit_18_3",
+    "exhibit_18_5",
+    "exhibit_18_6",
+    "freed_up_funds",
+    "dataframe_build",
+    "streamlit_render",
+)
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+_active = ContextVar("apv_profiler", default=None)
+
+
+def enabled(query_value=None):
+    """True if APV_PROFILE is set, or a ``profile`` query value is truthy."""
+    if os.environ.get("APV_PROFILE", "").strip().lower() in _TRUTHY:
+        return True
+    return str(query_value or "").strip().lower() in _TRUTHY
+
+
+class Profiler:
+    """Wall time and call count per stage, plus free-form counters."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def rows(self):
+        """One dict per stage (known stages first), with ms, calls and share."""
+        names = [s for s in STAGES if s in self.seconds]
+        names += sorted(set(self.seconds) - set(names))
+        total = sum(self.seconds.values()) or 1.0
+        return [{
+            "stage": name,
+            "ms": self.seconds[name] * 1e3,
+            "calls": self.calls[name],
+            "share": self.seconds[name] / total,
+        } for name in names]
+
+    def to_dict(self):
+        return {
+            "wall_ms": (time.perf_counter() - self.started) * 1e3,
+            "stages": self.rows(),
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def start(profiler):
+    """Make ``profiler`` the active one for this context; returns a reset token."""
+    return _active.set(profiler)
+
+
+def stop(token):
+    _active.reset(token)
+
+
+@contextmanager
+def activate(profiler):
+    token = start(profiler)
+    try:
+        yield profiler
+    finally:
+        stop(token)
+
+
+def active():
+    return _active.get()
+
+
+@contextmanager
+def stage(name):
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add(name, time.perf_counter() - t0)
+
+
+def count(name, n=1):
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.count(name, n)
@@ -0,0 +1,241 @@
+# apv_qmc.py
+# Variance-reduced Monte Carlo for the APV: quasi-random (Sobol / Halton)
+# sampling, antithetic variates and a control variate built from the
+# deterministic APV, each selectable per run.
+#
+# Every run is split into R independent replicates (independently randomized
+# point sets), and standard errors come from the spread of the replicate
+# estimates, so they stay valid for quasi-random points, where paths are not
+# independent. The variance-reduction factor (VRF) is the i.i.d. variance of
+# the plain estimator over the same paths divided by the achieved variance:
+# plain sampling needs VRF times more paths for the same standard error.
+#
+# The control variate is the first-order expansion of the APV around the
+# deterministic case, Y = APV(base) + sum_k slope_k (x_k - base_k), with
+# slopes from apv_greeks.py (finite difference for the FX shock). E[Y] is
+# known exactly, and when every drawn input is Normal so is P(Y > 0), which
+# then also serves as a control for P(APV > 0).
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+import apv_montecarlo as mc
+from apv_engine import APVParams
+from apv_greeks import greeks
+
+SAMPLERS = ("random", "halton", "sobol", "qmc")
+DEFAULT_REPLICATES = 32
+
+_HALTON_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53)
+_FX_STEP = 1e-4
+_EPS = 1e-15
+
+
+def have_sobol():
+    try:
+        from scipy.stats import qmc  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# -------------------------------
+# Point sets in (0, 1)^d
+# -------------------------------
+def halton(n, d, rng=None):
+    """First ``n`` Halton points in ``d`` dimensions (index 0 skipped), with a
+    random shift modulo 1 when ``rng`` is given (randomized QMC)."""
+    if d > len(_HALTON_PRIMES):
+        raise ValueError(f"Halton sampling supports up to {len(_HALTON_PRIMES)} dimensions")
+    idx = np.arange(1, n + 1, dtype=np.int64)
+    out = np.empty((n, d))
+    for j, base in enumerate(_HALTON_PRIMES[:d]):
+        i, f, x = idx.copy(), 1.0 / base, np.zeros(n)
+        while i.any():
+            x += f * (i % base)
+            i //= base
+            f /= base
+        out[:, j] = x
+    if rng is not None:
+        out = (out + rng.random(d)) % 1.0
+    return out
+
+
+def sobol(n, d, rng):
+    """Scrambled Sobol points (needs scipy)."""
+    try:
+        from scipy.stats import qmc
+    except ImportError as exc:
+        raise ImportError("Sobol sampling needs scipy (pip install scipy); "
+                          "use sampler='halton' or 'qmc'") from exc
+    return qmc.Sobol(d, scramble=True, seed=rng).random(n)
+
+
+def uniforms(sampler, n, d, rng):
+    if sampler == "random":
+        u = rng.random((n, d))
+    elif sampler == "halton":
+        u = halton(n, d, rng)
+    elif sampler == "sobol":
+        u = sobol(n, d, rng)
+    else:
+        raise ValueError(f"Unknown sampler {sampler!r}; expected one of {SAMPLERS}")
+    return np.clip(u, _EPS, 1.0 - _EPS)
+
+
+# -------------------------------
+# Control variate
+# -------------------------------
+def linear_control(base, distributions):
+    """(APV(base), slope per drawn input, base value per drawn input)."""
+    names = [k for k in distributions if k != "fx_shock"]
+    g = greeks([base], inputs=names) if names else None
+    apv0 = float(mc.value_paths(base, {}, 1)[0])
+    slopes = {k: float(g.d("apv", k)[0]) for k in names}
+    centre = {k: getattr(base, k) for k in names}
+    if "fx_shock" in distributions:
+        up, down = mc.value_paths(base, {"fx_shock": np.array([_FX_STEP, -_FX_STEP])}, 2)
+        slopes["fx_shock"] = float(up - down) / (2 * _FX_STEP)
+        centre["fx_shock"] = 0.0
+    return apv0, slopes, centre
+
+
+def _normal_cdf(x):
+    return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+
+# -------------------------------
+# Simulation
+# -------------------------------
+@dataclass
+class VarianceReducedResult:
+    n_paths: int
+    replicates: int
+    sampler: str
+    antithetic: bool
+    control_variate: bool
+    mean: float
+    std_error: float
+    prob_positive: float
+    prob_std_error: float
+    naive_std_error: float       # i.i.d. std error of the plain mean over the same paths
+    naive_prob_std_error: float
+    vrf_mean: float
+    vrf_prob: float
+
+    def summary(self):
+        return dict(self.__dict__)
+
+
+def _replicate_size(n_paths, replicates, sampler, antithetic):
+    # Base points per replicate (antithetic mirrors double them); Sobol
+    # balance properties need a power of two
+    m = math.ceil(n_paths / replicates / (2 if antithetic else 1))
+    if sampler == "sobol":
+        m = 1 << max(0, (m - 1).bit_length())
+    return max(m, 1)
+
+
+def simulate(base=None, n_paths=100_000, distributions=None, seed=None,
+             sampler="random", antithetic=False, control_variate=False,
+             replicates=DEFAULT_REPLICATES, memory_budget_mb=256, fx_model=None):
+    """Mean APV and P(APV > 0) with the selected variance reduction.
+
+    ``sampler`` is ``"random"``, ``"halton"``, ``"sobol"`` (needs scipy) or
+    ``"qmc"`` (Sobol if scipy is installed, Halton otherwise). The path count
+    is rounded up so every replicate has the same size (a power of two per
+    replicate for Sobol). Standard errors and VRFs come from ``replicates``
+    independent replicates; with plain sampling the VRF is 1 up to the noise
+    of that estimate. An ``fx_model`` (apv_fx.py) adds stochastic FX paths;
+    they are drawn pseudo-randomly, outside the quasi-random point set.
+    """
+    base = base or APVParams()
+    if distributions is None:
+        distributions = mc.default_distributions(base)
+    unknown = set(distributions) - set(mc.SIMULATED_INPUTS)
+    if unknown:
+        raise ValueError(f"Cannot simulate input(s): {sorted(unknown)}")
+    if sampler == "qmc":
+        sampler = "sobol" if have_sobol() else "halton"
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler {sampler!r}; expected one of {SAMPLERS}")
+    if replicates < 2:
+        raise ValueError("Need at least 2 replicates to estimate the standard error")
+
+    names = list(distributions)
+    dists = [distributions[k] for k in names]
+    rng = np.random.default_rng(seed)
+    m = _replicate_size(n_paths, replicates, sampler, antithetic)
+    chunk = mc.chunk_size_for(base.years, memory_budget_mb)
+
+    apv0, slopes, centre = linear_control(base, distributions)
+    slope = np.array([slopes[k] for k in names])
+    x0 = np.array([centre[k] for k in names])
+    # Y is centred on APV(base): E[Y - apv0] = sum slope_k (E[x_k] - base_k)
+    y_mean = float(slope @ (np.array([d.mean for d in dists]) - x0))
+    normal = all(isinstance(d, (mc.Normal, mc.Fixed)) for d in dists)
+    if normal:
+        sd = np.array([d.sd if isinstance(d, mc.Normal) else 0.0 for d in dists])
+        y_sd = float(np.sqrt(((slope * sd) ** 2).sum()))
+        p_y = _normal_cdf((apv0 + y_mean) / y_sd) if y_sd > 0 else float(apv0 + y_mean > 0)
+
+    # Per-replicate sums of a = APV - apv0, y = Y - apv0 and the indicators
+    # p = 1{APV > 0}, q = 1{Y > 0}; paths themselves are not kept
+    keys = ("a", "y", "aa", "ay", "yy", "p", "q", "pq", "qq")
+    sums = {k: np.zeros(replicates) for k in keys}
+    for r in range(replicates):
+        u = uniforms(sampler, m, len(names), rng)
+        if antithetic:
+            u = np.concatenate([u, 1.0 - u])
+        for lo in range(0, len(u), chunk):
+            block = u[lo:lo + chunk]
+            x = np.column_stack([d.ppf(block[:, j]) for j, d in enumerate(dists)])
+            draws = {k: x[:, j] for j, k in enumerate(names)}
+            fx_factor = mc.draw_fx(fx_model, rng, len(block), base.years)
+            a = mc.value_paths(base, draws, len(block), fx_factor) - apv0
+            y = (x - x0) @ slope
+            p = (a + apv0 > 0).astype(np.float64)
+            q = (y + apv0 > 0).astype(np.float64)
+            for k, v in (("a", a), ("y", y), ("aa", a * a), ("ay", a * y), ("yy", y * y),
+                         ("p", p), ("q", q), ("pq", p * q), ("qq", q)):
+                sums[k][r] += v.sum()
+
+    per_rep = m * (2 if antithetic else 1)
+    n = per_rep * replicates
+    tot = {k: v.sum() for k, v in sums.items()}
+
+    def cov(u, v, uv):
+        return (tot[uv] - tot[u] * tot[v] / n) / (n - 1)
+
+    mean_r = sums["a"] / per_rep
+    prob_r = sums["p"] / per_rep
+    if control_variate:
+        var_y = cov("y", "y", "yy")
+        beta = cov("a", "y", "ay") / var_y if var_y > 0 else 0.0
+        mean_r = mean_r - beta * (sums["y"] / per_rep - y_mean)
+        if normal:
+            var_q = cov("q", "q", "qq")
+            beta_p = cov("p", "q", "pq") / var_q if var_q > 0 else 0.0
+            prob_r = prob_r - beta_p * (sums["q"] / per_rep - p_y)
+
+    mean, prob = float(mean_r.mean()) + apv0, float(prob_r.mean())
+    se = float(mean_r.std(ddof=1)) / math.sqrt(replicates)
+    prob_se = float(prob_r.std(ddof=1)) / math.sqrt(replicates)
+    naive_se = math.sqrt(max(cov("a", "a", "aa"), 0.0) / n)
+    p_plain = tot["p"] / n
+    naive_prob_se = math.sqrt(p_plain * (1.0 - p_plain) / n)
+
+    def vrf(naive, achieved):
+        if achieved > 0:
+            return (naive / achieved) ** 2
+        return math.inf if naive > 0 else 1.0
+
+    return VarianceReducedResult(
+        n_paths=n, replicates=replicates, sampler=sampler, antithetic=antithetic,
+        control_variate=control_variate, mean=mean, std_error=se,
+        prob_positive=prob, prob_std_error=prob_se,
+        naive_std_error=naive_se, naive_prob_std_error=naive_prob_se,
+        vrf_mean=vrf(naive_se, se), vrf_prob=vrf(naive_prob_se, prob_se),
+    )
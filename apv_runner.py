@@ -0,0 +1,212 @@
+# apv_runner.py
+# Command-line scenario runner: streams scenarios from CSV or Parquet in
+# fixed-size chunks, values each chunk with the batch engine and appends the
+# results to the output file, so memory stays flat however long the input is.
+#
+#   python apv_runner.py scenarios.csv results.csv --chunk-size 100000
+#   python apv_runner.py scenarios.parquet results.parquet --method closed_form
+#   python apv_runner.py scenarios.csv results.csv --method exact   # int64 cents
+#
+# Input columns are named after the APVParams fields in model units (rates as
+# decimals, e.g. K_ud = 0.12). Missing fields take the Centralia defaults and
+# any other columns (ids, labels, ...) are copied through to the output.
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from apv_closed_form import compute_closed_form
+from apv_engine import APVParams, COMPONENTS, PARAM_FIELDS, compute_batch
+from apv_money import compute_batch_exact
+
+OUTPUT_COLUMNS = COMPONENTS + ("lambda_project",)
+
+_METHODS = {
+    "schedule": compute_batch,
+    "closed_form": compute_closed_form,
+    "exact": compute_batch_exact,
+}
+
+
+def _format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "parquet" if os.path.splitext(path)[1].lower() in (".parquet", ".pq") else "csv"
+
+
+# -------------------------------
+# Readers (yield DataFrames of at most chunk_size rows)
+# -------------------------------
+def _read_csv(path, chunk_size):
+    import pandas as pd
+
+    # Fixed dtypes so every chunk agrees: parameters are floats, pass-through
+    # columns are kept as text (inferring them per chunk lets an id column
+    # turn from int to str, or an int column to float on a blank)
+    dtype = defaultdict(lambda: "str", dict.fromkeys(PARAM_FIELDS, "float64"))
+    yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+
+
+def _read_parquet(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise SystemExit("Parquet input needs pyarrow (pip install pyarrow)") from exc
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+# -------------------------------
+# Writers (append one chunk at a time)
+# -------------------------------
+class _CSVWriter:
+    # pyarrow's CSV writer is ~10x faster than DataFrame.to_csv on float
+    # columns; fall back to pandas when pyarrow isn't installed
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+        self.writer = None
+        self.schema = None
+        try:
+            import pyarrow.csv  # noqa: F401
+            self.arrow = True
+        except ImportError:
+            self.arrow = False
+
+    def write(self, frame):
+        if self.arrow:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+
+            table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+            if self.writer is None:
+                self.schema = table.schema
+                self.writer = pa_csv.CSVWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        elif self.header:  # empty input: still leave a file with the header row
+            import pandas as pd
+
+            pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(self.path, index=False)
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)") from exc
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Later chunks are converted to the first chunk's schema
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def value_frame(frame, method="schedule", keep_inputs=False):
+    """APV and component PV columns for a DataFrame of scenarios.
+
+    Non-parameter columns are carried over; parameter columns only with
+    ``keep_inputs``. The ``exact`` method writes ``<component>_cents`` int64
+    columns instead (apv_money.py).
+    """
+    params = {k: frame[k].to_numpy() for k in PARAM_FIELDS if k in frame.columns}
+    if not params:
+        # No parameter columns at all: every row is the default case
+        params = {"years": np.full(len(frame), APVParams().years)}
+    results = _METHODS[method](params)
+    out = frame.copy() if keep_inputs else frame.drop(columns=[k for k in params if k in frame.columns])
+    if method == "exact":
+        for k in COMPONENTS:
+            out[f"{k}_cents"] = results[k]
+        return out
+    for k in OUTPUT_COLUMNS:
+        out[k] = results[k]
+    return out
+
+
+def run(input_path, output_path, chunk_size=100_000, method="schedule",
+        input_format=None, output_format=None, keep_inputs=False, log=None):
+    """Stream ``input_path`` through the engine into ``output_path``.
+
+    Returns a dict with row count, elapsed seconds and rows per second.
+    """
+    readers = {"csv": _read_csv, "parquet": _read_parquet}
+    writers = {"csv": _CSVWriter, "parquet": _ParquetWriter}
+    reader = readers[_format(input_path, input_format)](input_path, chunk_size)
+    writer = writers[_format(output_path, output_format)](output_path)
+
+    rows, t0 = 0, time.perf_counter()
+    try:
+        for chunk in reader:
+            if len(chunk) == 0:
+                continue
+            out = value_frame(chunk, method, keep_inputs)
+            writer.write(out)
+            rows += len(chunk)
+            if log:
+                log(f"{rows:,} rows")
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - t0
+    return {"rows": rows, "seconds": elapsed, "rows_per_sec": rows / elapsed if elapsed else 0.0}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream APV scenarios from CSV/Parquet through the engine.")
+    parser.add_argument("input", help="scenario file (.csv or .parquet)")
+    parser.add_argument("output", help="result file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows per chunk (default 100000)")
+    parser.add_argument("--method", choices=sorted(_METHODS), default="schedule",
+                        help="year-by-year schedule or O(1) closed form")
+    parser.add_argument("--input-format", choices=("csv", "parquet"), help="override input format detection")
+    parser.add_argument("--output-format", choices=("csv", "parquet"), help="override output format detection")
+    parser.add_argument("--keep-inputs", action="store_true", help="copy the parameter columns to the output too")
+    parser.add_argument("--quiet", action="store_true", help="no per-chunk progress on stderr")
+    args = parser.parse_args(argv)
+
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr, flush=True))
+    stats = run(args.input, args.output, args.chunk_size, args.method,
+                args.input_format, args.output_format, args.keep_inputs, log)
+
+    peak = _peak_rss_mb()
+    print(f"{stats['rows']:,} rows in {stats['seconds']:.2f} s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)"
+          + (f", peak RSS {peak:,.0f} MiB" if peak is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
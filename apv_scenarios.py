@@ -0,0 +1,263 @@
+# apv_scenarios.py
+# Compact columnar container for very large scenario sets (10^7–10^8 rows).
+#
+# A ScenarioSet keeps one NumPy column per APVParams field with a fixed dtype
+# (float64, or float32 with ``compact=True``; years as uint16). A field that is
+# the same for every scenario is stored once as a zero-stride broadcast, so it
+# costs no memory per row. A typical sweep varies a handful of inputs:
+# 50 million scenarios varying 4 float64 fields and years take 1.7 GB,
+# against ~19 GB (~390 bytes each) as a list of APVParams.
+#
+# Slicing returns views (no copy), so ``chunks()`` hands the engine bounded
+# pieces of the set. Single rows are read through the ``Scenario`` view,
+# which has no per-row storage of its own.
+
+import numpy as np
+
+import apv_montecarlo as mc
+from apv_closed_form import closed_form_components
+from apv_engine import (
+    APVParams, COMPONENTS, PARAM_FIELDS, batch_components, total_components,
+)
+
+YEARS_DTYPE = np.dtype(np.uint16)
+DEFAULT_CHUNK = 100_000
+
+_DEFAULTS = APVParams().to_dict()
+
+_KERNELS = {
+    "schedule": batch_components,
+    "closed_form": closed_form_components,
+}
+
+
+def field_dtypes(compact=False):
+    """Storage dtype per APVParams field."""
+    real = np.dtype(np.float32 if compact else np.float64)
+    return {k: YEARS_DTYPE if k == "years" else real for k in PARAM_FIELDS}
+
+
+def scenario_dtype(compact=False):
+    """Packed structured dtype with one field per APVParams field."""
+    return np.dtype(list(field_dtypes(compact).items()))
+
+
+def _is_constant(col):
+    return col.ndim == 1 and col.strides[0] == 0
+
+
+class Scenario:
+    """Read-only view of row ``i`` of a ScenarioSet (fields as attributes)."""
+
+    __slots__ = ("_columns", "_i")
+
+    def __init__(self, columns, i):
+        self._columns = columns
+        self._i = i
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in PARAM_FIELDS}
+
+    def to_params(self):
+        return APVParams(**self.to_dict())
+
+    def __repr__(self):
+        return f"Scenario({', '.join(f'{k}={getattr(self, k)!r}' for k in PARAM_FIELDS)})"
+
+
+def _field(name):
+    def get(self):
+        return self._columns[name][self._i].item()
+    return property(get)
+
+
+for _name in PARAM_FIELDS:
+    setattr(Scenario, _name, _field(_name))
+
+
+class ScenarioSet:
+    """Struct-of-arrays scenario portfolio.
+
+    ``columns`` maps field name -> array or scalar. It may also be a NumPy
+    structured array (e.g. a memory-mapped ``.npy``), whose fields are used as
+    views without copying. Scalars and omitted fields (APVParams defaults)
+    are stored as constants. Columns already in the storage dtype are not
+    copied. ``compact=True`` halves storage with float32 (~7 significant
+    digits), so APVs then differ from float64 inputs at the ~1e-7 level.
+    """
+
+    __slots__ = ("_columns", "_n", "compact")
+
+    def __init__(self, columns=None, compact=False):
+        if isinstance(columns, np.ndarray) and columns.dtype.names:
+            columns = {k: columns[k] for k in columns.dtype.names}
+        columns = dict(columns or {})
+        unknown = set(columns) - set(PARAM_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown APV parameter(s): {sorted(unknown)}")
+
+        sizes = {np.size(v) for v in columns.values() if np.ndim(v) > 0}
+        if len(sizes) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(sizes)}")
+        n = sizes.pop() if sizes else 1
+
+        dtypes = field_dtypes(compact)
+        cols = {}
+        for k in PARAM_FIELDS:
+            v = columns.get(k, _DEFAULTS[k])
+            if n and np.ndim(v) > 0 and _is_constant(np.asarray(v).reshape(n)):
+                v = np.asarray(v).reshape(n)[0]
+            if np.ndim(v) == 0:
+                if k == "years" and not 1 <= v <= np.iinfo(YEARS_DTYPE).max:
+                    raise ValueError("Project life (years) must be between 1 and 65535")
+                cols[k] = np.broadcast_to(np.asarray(v, dtype=dtypes[k]), (n,))
+            else:
+                cols[k] = np.asarray(v).reshape(n)
+                if k == "years":
+                    if cols[k].size and (cols[k].min() < 1 or cols[k].max() > np.iinfo(YEARS_DTYPE).max):
+                        raise ValueError("Project life (years) must be between 1 and 65535")
+                cols[k] = cols[k].astype(dtypes[k], copy=False)
+        self._columns = cols
+        self._n = n
+        self.compact = compact
+
+    @classmethod
+    def from_records(cls, scenarios, compact=False):
+        """Build from a sequence of APVParams / dicts (small sets only).
+        Fields equal in every record are stored as constants."""
+        rows = [s.to_dict() if isinstance(s, APVParams) else {**_DEFAULTS, **s} for s in scenarios]
+        if not rows:
+            raise ValueError("No scenarios given")
+        columns = {}
+        for k in PARAM_FIELDS:
+            v = np.array([r[k] for r in rows])
+            columns[k] = v if (v != v[0]).any() else np.broadcast_to(v[:1], v.shape)
+        return cls(columns, compact)
+
+    @classmethod
+    def allocate(cls, n, fields, base=None, compact=False):
+        """Uninitialized columns for ``fields`` to fill in place through
+        ``column()``; every other field is a constant taken from ``base``
+        (default Centralia case)."""
+        base = (base or APVParams()).to_dict()
+        dtypes = field_dtypes(compact)
+        columns = {k: base[k] for k in PARAM_FIELDS}
+        for k in fields:
+            columns[k] = np.empty(int(n), dtype=dtypes[k])
+        if "years" in fields:
+            columns["years"][:] = base["years"]
+        return cls(columns, compact)
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            i = index + self._n if index < 0 else index
+            if not 0 <= i < self._n:
+                raise IndexError("scenario index out of range")
+            return Scenario(self._columns, i)
+        # Slices give views; index arrays / masks copy only the varying columns
+        return self._take(index)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield Scenario(self._columns, i)
+
+    def _take(self, index):
+        if isinstance(index, slice):
+            n = len(range(*index.indices(self._n)))
+        else:
+            index = np.arange(self._n)[index]
+            n = len(index)
+        out = ScenarioSet.__new__(ScenarioSet)
+        out._columns = {
+            k: np.broadcast_to(v[:1], (n,)) if _is_constant(v) else v[index]
+            for k, v in self._columns.items()
+        }
+        out._n = n
+        out.compact = self.compact
+        return out
+
+    def column(self, name):
+        """Stored column of field ``name``; varying columns can be filled in
+        place (see ``allocate``), constants are read-only broadcasts."""
+        return self._columns[name]
+
+    def varying(self):
+        """Fields stored per scenario (not as constants)."""
+        return tuple(k for k, v in self._columns.items() if not _is_constant(v))
+
+    @property
+    def nbytes(self):
+        """Bytes actually held (constants count once)."""
+        return sum(v.dtype.itemsize if _is_constant(v) else v.nbytes for v in self._columns.values())
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK):
+        """Consecutive zero-copy slices of at most ``chunk_size`` scenarios."""
+        for lo in range(0, self._n, chunk_size):
+            yield self[lo:lo + chunk_size]
+
+    def to_columns(self):
+        """Engine columns (see ``apv_engine.stack_params``): float64 / int64.
+
+        Converts only this set's rows, so call it on a chunk for large sets;
+        constants stay zero-stride.
+        """
+        cols = {}
+        for k, v in self._columns.items():
+            dtype = np.int64 if k == "years" else np.float64
+            if _is_constant(v):
+                cols[k] = np.broadcast_to(v[:1].astype(dtype), (self._n,))
+            else:
+                cols[k] = v.astype(dtype, copy=False)
+        return cols
+
+    def to_structured(self):
+        """Packed structured array (a copy), e.g. for ``np.save``."""
+        out = np.empty(self._n, dtype=scenario_dtype(self.compact))
+        for k, v in self._columns.items():
+            out[k] = v
+        return out
+
+    def __repr__(self):
+        return (f"ScenarioSet({self._n:,} scenarios, varying={list(self.varying())}, "
+                f"{self.nbytes / 2 ** 20:,.1f} MiB)")
+
+
+def evaluate(scenarios, method="closed_form", chunk_size=None, outputs=("apv",),
+             memory_budget_mb=256):
+    """Value a ScenarioSet chunk by chunk into preallocated output columns.
+
+    ``method`` is ``"closed_form"`` (default) or ``"schedule"``. The schedule
+    kernel's chunk size defaults to what fits its (chunk × years) work arrays
+    in ``memory_budget_mb``. Returns a dict of float64 arrays for ``outputs``
+    (any of COMPONENTS plus ``lambda_project``).
+    """
+    if method not in _KERNELS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {sorted(_KERNELS)}")
+    unknown = set(outputs) - set(COMPONENTS) - {"lambda_project"}
+    if unknown:
+        raise ValueError(f"Unknown output(s): {sorted(unknown)}")
+    if not isinstance(scenarios, ScenarioSet):
+        scenarios = ScenarioSet.from_records(scenarios)
+    n = len(scenarios)
+    if n == 0:
+        return {k: np.empty(0, dtype=np.float64) for k in outputs}
+    if chunk_size is None:
+        if method == "schedule":
+            chunk_size = mc.chunk_size_for(int(scenarios.column("years").max()), memory_budget_mb)
+        else:
+            chunk_size = DEFAULT_CHUNK
+
+    out = {k: np.empty(n, dtype=np.float64) for k in outputs}
+    kernel = _KERNELS[method]
+    lo = 0
+    for chunk in scenarios.chunks(chunk_size):
+        cols = chunk.to_columns()
+        values = total_components(cols, kernel(cols))
+        hi = lo + len(chunk)
+        for k in outputs:
+            out[k][lo:hi] = values[k]
+        lo = hi
+    return out
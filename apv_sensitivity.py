@@ -0,0 +1,158 @@
+# apv_sensitivity.py
+# Two-way sensitivity surfaces: sweep any two APV inputs over a grid and get
+# the full APV matrix in one vectorized closed-form pass.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from apv_closed_form import closed_form_apv
+from apv_engine import PARAM_FIELDS, stack_params
+
+# Inputs offered in the UI, with their labels. Rates are shown in percent.
+SWEEP_INPUTS = {
+    "K_ud": "Unlevered cost of capital K_ud",
+    "i_d": "Domestic borrowing / discount rate i_d",
+    "i_c": "Concessional loan rate i_c",
+    "S0": "Current exchange rate S0 ($/€)",
+    "pi_f": "Foreign inflation π_f",
+    "pi_d": "Domestic inflation π_d",
+    "tax": "Corporate tax rate τ",
+    "units_y1": "Year-1 sales units",
+    "units_growth": "Sales units growth",
+    "selling_price": "Selling price per unit (€)",
+    "production_cost": "Production cost per unit (€)",
+    "contrib_growth": "Contribution growth",
+    "lost_units_growth": "Lost units growth",
+    "lost_margin_growth": "Lost margin growth",
+    "C0_eur": "Initial project cost C0 (€)",
+    "concession_loan_eur": "Concessional loan (€)",
+    "years": "Project life (years)",
+}
+
+PERCENT_INPUTS = {
+    "K_ud", "i_d", "i_c", "pi_f", "pi_d", "tax", "units_growth",
+    "contrib_growth", "lost_units_growth", "lost_margin_growth",
+}
+
+
+@dataclass
+class SensitivityGrid:
+    x_name: str
+    y_name: str
+    x: np.ndarray
+    y: np.ndarray
+    apv: np.ndarray  # shape (len(y), len(x))
+
+
+def grid_axis(name, low, high, steps):
+    values = np.linspace(low, high, int(steps))
+    if name == "years":
+        values = np.unique(np.maximum(1, np.round(values)))
+    return values
+
+
+def sensitivity_grid(base, x_name, x_values, y_name, y_values):
+    """APV over every (y, x) pair with all other inputs held at ``base``."""
+    for name in (x_name, y_name):
+        if name not in PARAM_FIELDS:
+            raise ValueError(f"Unknown APV parameter: {name}")
+    if x_name == y_name:
+        raise ValueError("Pick two different inputs for a two-way grid")
+
+    x = np.asarray(x_values, dtype=np.float64)
+    y = np.asarray(y_values, dtype=np.float64)
+    X, Y = np.meshgrid(x, y)
+    cols = stack_params({**base.to_dict(), x_name: X.ravel(), y_name: Y.ravel()})
+    apv = closed_form_apv(cols).reshape(Y.shape)
+    return SensitivityGrid(x_name, y_name, x, y, apv)
+
+
+def zero_contour(grid):
+    """Points where APV crosses zero, interpolated linearly between grid nodes.
+
+    Crossings are searched along y for every x column, so a monotone boundary
+    comes back as one point per x, ordered by x.
+    """
+    z = grid.apv
+    lo, hi = z[:-1, :], z[1:, :]
+    rows, cols = np.nonzero((lo == 0) | (np.sign(lo) * np.sign(hi) < 0))
+    z0, z1 = lo[rows, cols], hi[rows, cols]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.where(z0 == z1, 0.0, z0 / (z0 - z1))
+    ys = grid.y[rows] + w * (grid.y[rows + 1] - grid.y[rows])
+    xs = grid.x[cols]
+    order = np.lexsort((ys, xs))
+    return xs[order], ys[order]
+
+
+def default_range(base, name):
+    # base ± 50%, in model units (decimals for rates)
+    value = getattr(base, name)
+    if value == 0:
+        return -0.05, 0.05
+    return tuple(sorted((value * 0.5, value * 1.5)))
+
+
+def axis_label(name):
+    return SWEEP_INPUTS.get(name, name) + (" (%)" if name in PERCENT_INPUTS else "")
+
+
+def _display(name, values):
+    return values * 100 if name in PERCENT_INPUTS else values
+
+
+def _edges(v):
+    # Cell boundaries halfway between neighbouring grid nodes
+    if len(v) == 1:
+        return v - 0.5, v + 0.5
+    mid = (v[:-1] + v[1:]) / 2
+    lo = np.concatenate(([2 * v[0] - mid[0]], mid))
+    hi = np.concatenate((mid, [2 * v[-1] - mid[-1]]))
+    return lo, hi
+
+
+def heatmap_chart(grid, max_cells=70):
+    """Altair heatmap of the APV surface with the APV = 0 contour on top.
+
+    The surface is thinned to at most ``max_cells`` per axis for the browser
+    (Altair inlines at most 5000 rows); the contour is traced on the
+    full-resolution grid.
+    """
+    import altair as alt
+    import pandas as pd
+
+    sx = max(1, -(-len(grid.x) // max_cells))
+    sy = max(1, -(-len(grid.y) // max_cells))
+    x = _display(grid.x_name, grid.x[::sx])
+    y = _display(grid.y_name, grid.y[::sy])
+    (x_lo, x_hi), (y_lo, y_hi) = _edges(x), _edges(y)
+    ix, iy = np.meshgrid(np.arange(len(x)), np.arange(len(y)))
+    ix, iy = ix.ravel(), iy.ravel()
+    cells = pd.DataFrame({
+        "x": x[ix], "y": y[iy], "x_lo": x_lo[ix], "x_hi": x_hi[ix],
+        "y_lo": y_lo[iy], "y_hi": y_hi[iy], "APV": grid.apv[::sy, ::sx].ravel(),
+    })
+    bound = float(np.abs(cells["APV"]).max()) or 1.0
+    x_title, y_title = axis_label(grid.x_name), axis_label(grid.y_name)
+
+    heat = alt.Chart(cells).mark_rect().encode(
+        x=alt.X("x_lo:Q", title=x_title, scale=alt.Scale(zero=False, nice=False)),
+        x2="x_hi:Q",
+        y=alt.Y("y_lo:Q", title=y_title, scale=alt.Scale(zero=False, nice=False)),
+        y2="y_hi:Q",
+        color=alt.Color("APV:Q", title="APV ($)",
+                        scale=alt.Scale(scheme="redblue", domain=[-bound, bound])),
+        tooltip=[alt.Tooltip("x:Q", title=x_title, format=",.4f"),
+                 alt.Tooltip("y:Q", title=y_title, format=",.4f"),
+                 alt.Tooltip("APV:Q", format="$,.2f")],
+    )
+
+    cx, cy = zero_contour(grid)
+    contour = alt.Chart(pd.DataFrame({
+        "x": _display(grid.x_name, cx), "y": _display(grid.y_name, cy),
+    })).mark_line(color="black", strokeWidth=2).encode(
+        x="x:Q", y="y:Q", order="x:Q",
+    )
+
+    return alt.layer(heat, contour)
@@ -0,0 +1,412 @@
+# apv_server.py
+# Local HTTP/JSON valuation service (standard library only).
+#
+#   python apv_server.py --port 8765
+#   curl -s localhost:8765/apv -d '{"S0": 1.25, "K_ud": 0.11}'
+#   curl -s localhost:8765/exhibits -d '{}'
+#   curl -s localhost:8765/stats
+#
+# Endpoints
+#   POST /apv        one scenario (APVParams fields, model units) -> APV and
+#                    component PVs. Requests arriving within --window-ms of
+#                    each other are coalesced into one compute_batch call.
+#   POST /exhibits   one scenario -> per-year Exhibit 18.2/18.3/18.5/18.6
+#                    columns plus the summary (through the shared result cache)
+#   GET  /stats      p50/p99 latency, request counts and batch-size histogram
+#   GET  /health
+#
+# ``python apv_server.py --load-test 200`` starts a server and drives it with
+# 200 concurrent keep-alive clients, then prints the stats.
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from apv_cache import cached_compute
+from apv_engine import APVParams, COMPONENTS, PARAM_FIELDS, compute_batch
+
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH = 4096
+LATENCY_SAMPLES = 100_000
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+MAX_BODY = 1 << 20
+MAX_YEARS = 1_000  # keeps a full batch's projects x years matrices bounded
+NONZERO = ("S0", "C0_eur", "concession_loan_eur")  # denominators of the debt ratios
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_params(body):
+    """Validated APVParams field dict from a JSON request body."""
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError as exc:  # JSONDecodeError, or an int past the digit limit
+        raise BadRequest(f"Invalid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise BadRequest("Body must be a JSON object of APVParams fields")
+    unknown = set(data) - set(PARAM_FIELDS)
+    if unknown:
+        raise BadRequest(f"Unknown APV parameter(s): {sorted(unknown)}")
+    out = {}
+    for k, v in data.items():
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            raise BadRequest(f"{k} must be a number")
+        try:
+            finite = math.isfinite(v)
+        except OverflowError:  # an int too large for a float
+            finite = False
+        if not finite:
+            raise BadRequest(f"{k} must be a finite number")
+        if k in NONZERO and v == 0:
+            raise BadRequest(f"{k} must be non-zero")
+        out[k] = v
+    if "years" in out:
+        if out["years"] != int(out["years"]) or not 1 <= out["years"] <= MAX_YEARS:
+            raise BadRequest(f"years must be an integer between 1 and {MAX_YEARS}")
+        out["years"] = int(out["years"])
+    return out
+
+
+def _finite(value):
+    """JSON-safe copy of a result: NaN and infinities become null."""
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+class Metrics:
+    """Request latencies (most recent LATENCY_SAMPLES) and batch sizes."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = Counter()
+        self.errors = 0
+        self.latency = {}  # endpoint -> deque of seconds
+        self.batch_sizes = Counter()  # power-of-two bucket -> batches
+        self.batches = 0
+        self.batched_requests = 0
+
+    def observe(self, endpoint, seconds, status):
+        self.requests[endpoint] += 1
+        if status >= 400:
+            self.errors += 1
+        self.latency.setdefault(endpoint, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+    def observe_batch(self, size):
+        self.batches += 1
+        self.batched_requests += size
+        self.batch_sizes[1 << (size - 1).bit_length()] += 1
+
+    def to_dict(self):
+        latency = {}
+        for endpoint, samples in self.latency.items():
+            ms = np.asarray(samples) * 1e3
+            latency[endpoint] = {
+                "count": len(ms),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+            }
+        return {
+            "uptime_s": time.time() - self.started,
+            "requests": dict(self.requests),
+            "errors": self.errors,
+            "latency": latency,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            # "<= n" -> number of batches with size in (n/2, n]
+            "batch_size_histogram": {f"<={k}": self.batch_sizes[k] for k in sorted(self.batch_sizes)},
+        }
+
+
+# -------------------------------
+# Micro-batching
+# -------------------------------
+class MicroBatcher:
+    """Coalesces concurrent ``submit`` calls into one ``compute_batch``.
+
+    The first request of a batch opens a window of ``window_ms``; everything
+    queued by then (up to ``max_batch``) is valued together and each caller
+    gets its own row back.
+    """
+
+    def __init__(self, metrics, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.metrics = metrics
+        self.window = window_ms / 1e3
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, params):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((params, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Drain anything else already waiting without extending the window
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            # The batch is valued on a worker thread so the event loop keeps
+            # serving connections meanwhile
+            self.metrics.observe_batch(len(batch))
+            rows = await loop.run_in_executor(None, self._evaluate, [p for p, _ in batch])
+            for (_, future), row in zip(batch, rows):
+                if future.done():
+                    continue
+                if isinstance(row, Exception):
+                    future.set_exception(row)
+                else:
+                    future.set_result(row)
+
+    @staticmethod
+    def _evaluate(params):
+        # One result dict (or exception) per request
+        try:
+            results = compute_batch(params)
+        except Exception:
+            # Value the rows one at a time so only the failing request errors
+            return [MicroBatcher._evaluate_one(p) for p in params]
+        columns = {k: _finite(v.tolist()) for k, v in results.items()}
+        return [{k: v[i] for k, v in columns.items()} for i in range(len(params))]
+
+    @staticmethod
+    def _evaluate_one(params):
+        try:
+            results = compute_batch([params])
+        except Exception as exc:  # one bad request must not kill the loop
+            return exc
+        return {k: _finite(v.item()) for k, v in results.items()}
+
+
+# -------------------------------
+# HTTP
+# -------------------------------
+class APVServer:
+    def __init__(self, host="127.0.0.1", port=8765, window_ms=DEFAULT_WINDOW_MS,
+                 max_batch=DEFAULT_MAX_BATCH):
+        self.host, self.port = host, port
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(self.metrics, window_ms, max_batch)
+        self.server = None
+        self.routes = {
+            ("POST", "/apv"): self._apv,
+            ("POST", "/exhibits"): self._exhibits,
+            ("GET", "/stats"): self._stats,
+            ("GET", "/health"): self._health,
+        }
+        self.paths = {p for _, p in self.routes}
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._connection, self.host, self.port,
+                                                 backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 413, {"error": "Request headers too large"}, close=True)
+                    break
+                t0 = time.perf_counter()
+                method, path, headers = _parse_head(head)
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await _respond(writer, 400, {"error": "Invalid Content-Length"}, close=True)
+                    break
+                if length > MAX_BODY:
+                    await _respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await _respond(writer, status, payload, close=not keep_alive)
+                # Unknown paths share one bucket so stats stay bounded
+                endpoint = path if path in self.paths else "other"
+                self.metrics.observe(endpoint, time.perf_counter() - t0, status)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if path in self.paths:
+                return 405, {"error": f"{method} not allowed on {path}"}
+            return 404, {"error": f"No route {path}"}
+        try:
+            return 200, await handler(body)
+        except BadRequest as exc:
+            return 400, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    async def _apv(self, body):
+        return await self.batcher.submit(parse_params(body))
+
+    async def _exhibits(self, body):
+        params = APVParams(**parse_params(body))
+        result = await asyncio.get_running_loop().run_in_executor(None, cached_compute, params)
+        exhibits = {
+            name: {k: np.asarray(v).tolist() for k, v in getattr(result, name).items()}
+            for name in ("exhibit_182", "exhibit_183", "exhibit_185", "exhibit_186")
+        }
+        return _finite({"params": params.to_dict(), "summary": result.meta, **exhibits})
+
+    async def _stats(self, body):
+        return self.metrics.to_dict()
+
+    async def _health(self, body):
+        return {"status": "ok", "components": list(COMPONENTS)}
+
+
+def _parse_head(head):
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    method, target = (parts[0], parts[1]) if len(parts) >= 2 else ("", "")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return method.upper(), target.split("?", 1)[0], headers
+
+
+async def _respond(writer, status, payload, close=False):
+    body = json.dumps(payload, allow_nan=False).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+# -------------------------------
+# Load test
+# -------------------------------
+async def _client(host, port, n_requests, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            body = json.dumps({"S0": float(rng.uniform(1.1, 1.5)),
+                               "K_ud": float(rng.uniform(0.08, 0.16))}).encode()
+            writer.write(b"POST /apv HTTP/1.1\r\nHost: localhost\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            _, _, headers = _parse_head(head)
+            await reader.readexactly(int(headers["content-length"]))
+    finally:
+        writer.close()
+
+
+async def load_test(clients=200, requests_per_client=50, window_ms=DEFAULT_WINDOW_MS):
+    """Run a server in-process and hit /apv from ``clients`` concurrent connections."""
+    server = await APVServer(port=0, window_ms=window_ms).start()
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(server.host, server.port, requests_per_client, rng)
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - t0
+    stats = server.metrics.to_dict()
+    await server.stop()
+    total = clients * requests_per_client
+    return {"clients": clients, "requests": total, "seconds": elapsed,
+            "requests_per_sec": total / elapsed, "stats": stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON APV valuation service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS,
+                        help="micro-batching window (default 2 ms)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--load-test", type=int, metavar="CLIENTS",
+                        help="run an in-process load test with this many clients and exit")
+    parser.add_argument("--requests", type=int, default=50, help="requests per load-test client")
+    args = parser.parse_args(argv)
+
+    if args.load_test:
+        report = asyncio.run(load_test(args.load_test, args.requests, args.window_ms))
+        print(json.dumps(report, indent=2))
+        return
+
+    async def serve():
+        server = await APVServer(args.host, args.port, args.window_ms, args.max_batch).start()
+        print(f"APV service on http://{server.host}:{server.port} "
+              f"(window {args.window_ms:g} ms, max batch {args.max_batch})")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
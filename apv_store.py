@@ -0,0 +1,410 @@
+# apv_store.py
+# On-disk columnar store for Monte Carlo and sweep results.
+#
+# A run is a directory holding one ``.npy`` file per column (APV, each
+# component PV, the drawn / varying inputs) plus ``meta.json`` describing the
+# run. Columns are written chunk by chunk while the run is valued and read
+# back through np.memmap, so a 10^8-path run never has to fit in RAM and can
+# be reopened in a later session without recomputing. The summaries below
+# (stats, histograms, exact quantiles, filtered rows) all stream over the
+# columns in fixed-size chunks.
+#
+#   python apv_store.py list
+#   python apv_store.py show ~/.cache/apv-calculator/runs/mc-20261018-101500-1a2b3c4d
+#   python apv_store.py prune --max-runs 5
+#
+# Runs live under $APV_RESULTS_DIR, else the user cache directory
+# ($XDG_CACHE_HOME or ~/.cache, %LOCALAPPDATA% on Windows). ``prune_runs``
+# deletes the oldest runs beyond a count / size limit.
+
+import argparse
+import json
+import os
+import secrets
+import shutil
+import sys
+import time
+from dataclasses import asdict
+
+import numpy as np
+
+import apv_montecarlo as mc
+from apv_engine import APVParams, COMPONENTS
+from apv_scenarios import ScenarioSet, evaluate
+
+
+def _cache_root():
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        base = os.environ["LOCALAPPDATA"]
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "apv-calculator", "runs")
+
+
+DEFAULT_ROOT = os.environ.get("APV_RESULTS_DIR") or _cache_root()
+DEFAULT_CHUNK = 1_000_000
+DEFAULT_MAX_RUNS = 20
+DEFAULT_MAX_BYTES = 2 << 30
+_QUANTILE_BINS = 4096
+
+
+class ResultStore:
+    """Columns of one run, memory-mapped from ``path``.
+
+    Use ``create`` to start a run and ``open`` to read an existing one; the
+    constructor itself only wraps an already-loaded ``meta`` dict.
+    """
+
+    def __init__(self, path, meta, mode="r"):
+        self.path = path
+        self.meta = meta
+        self.mode = mode
+        self._maps = {}
+
+    @classmethod
+    def create(cls, path, n, columns, info=None):
+        """New run directory with ``columns`` of ``n`` float64 values each."""
+        os.makedirs(path, exist_ok=False)
+        meta = {
+            "n": int(n),
+            "columns": list(columns),
+            "complete": False,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "info": info or {},
+        }
+        store = cls(path, meta, mode="r+")
+        for name in columns:
+            store._maps[name] = np.lib.format.open_memmap(
+                store._file(name), mode="w+", dtype=np.float64, shape=(int(n),))
+        store._write_meta()
+        return store
+
+    @classmethod
+    def open(cls, path):
+        """Existing run, read-only. Incomplete runs open with
+        ``complete = False`` in their meta."""
+        with open(os.path.join(path, "meta.json")) as f:
+            return cls(path, json.load(f))
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _write_meta(self):
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def __len__(self):
+        return self.meta["n"]
+
+    @property
+    def columns(self):
+        return tuple(self.meta["columns"])
+
+    @property
+    def complete(self):
+        return self.meta["complete"]
+
+    @property
+    def nbytes(self):
+        """Size of the run's files on disk."""
+        return sum(e.stat().st_size for e in os.scandir(self.path) if e.is_file())
+
+    def column(self, name):
+        """Memory-mapped column; pages are only read when touched."""
+        if name not in self.meta["columns"]:
+            raise KeyError(f"No column {name!r}; stored: {self.columns}")
+        if name not in self._maps:
+            self._maps[name] = np.load(self._file(name), mmap_mode=self.mode)
+        return self._maps[name]
+
+    def write(self, start, values):
+        """Store ``values[name][i]`` at row ``start + i`` for every column."""
+        for name in self.meta["columns"]:
+            v = values[name]
+            self.column(name)[start:start + len(v)] = v
+
+    def finish(self):
+        """Flush the columns and mark the run complete."""
+        for m in self._maps.values():
+            m.flush()
+        self.meta["complete"] = True
+        self._write_meta()
+
+    # -------------------------------
+    # Streaming summaries
+    # -------------------------------
+    def chunks(self, columns, where=None, chunk_size=DEFAULT_CHUNK):
+        """Yield dicts of in-memory column chunks, optionally filtered.
+
+        ``where`` maps column -> (low, high) with inclusive bounds; None leaves
+        a side open.
+        """
+        columns = list(columns)
+        needed = columns + [k for k in (where or {}) if k not in columns]
+        for lo in range(0, len(self), chunk_size):
+            block = {k: np.asarray(self.column(k)[lo:lo + chunk_size]) for k in needed}
+            if where:
+                keep = _mask(block, where)
+                block = {k: block[k][keep] for k in columns}
+            yield block
+
+    def count(self, where=None, chunk_size=DEFAULT_CHUNK):
+        if not where:
+            return len(self)
+        first = next(iter(where))
+        return sum(len(b[first]) for b in self.chunks([first], where, chunk_size))
+
+    def stats(self, name, where=None, chunk_size=DEFAULT_CHUNK):
+        """Count, mean, std, min, max and P(> 0) of the finite values,
+        combined chunk by chunk (Chan et al.) so the std stays accurate."""
+        n, mean, m2, positive, nonfinite = 0, 0.0, 0.0, 0, 0
+        low, high = np.inf, -np.inf
+        for block in self.chunks([name], where, chunk_size):
+            x = block[name]
+            finite = np.isfinite(x)
+            nonfinite += int(x.size - finite.sum())
+            x = x[finite]
+            if not x.size:
+                continue
+            k, mu = x.size, float(x.mean())
+            delta = mu - mean
+            m2 += float(((x - mu) ** 2).sum()) + delta ** 2 * n * k / (n + k)
+            mean += delta * k / (n + k)
+            n += k
+            positive += int((x > 0).sum())
+            low, high = min(low, float(x.min())), max(high, float(x.max()))
+        std = (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+        return {
+            "count": n, "nonfinite": nonfinite, "mean": mean if n else float("nan"),
+            "std": std, "std_error": std / n ** 0.5 if n else float("nan"),
+            "min": low, "max": high, "prob_positive": positive / n if n else float("nan"),
+        }
+
+    def histogram(self, name, bins=60, value_range=None, where=None, chunk_size=DEFAULT_CHUNK):
+        """(counts, edges) like ``np.histogram``, accumulated per chunk."""
+        if value_range is None:
+            s = self.stats(name, where, chunk_size)
+            value_range = (s["min"], s["max"]) if s["count"] else (0.0, 1.0)
+        counts = np.zeros(bins, dtype=np.int64)
+        for block in self.chunks([name], where, chunk_size):
+            x = block[name]
+            counts += np.histogram(x[np.isfinite(x)], bins=bins, range=value_range)[0]
+        return counts, np.linspace(value_range[0], value_range[1], bins + 1)
+
+    def quantiles(self, name, percentiles=mc.DEFAULT_PERCENTILES, where=None,
+                  chunk_size=DEFAULT_CHUNK):
+        """Exact percentiles (``np.percentile``'s linear rule) of the finite values.
+
+        Two streaming passes: a fine histogram locates the bin holding each
+        requested rank, then only the values in those bins are gathered and
+        sorted. Memory is bounded by the fullest of those bins.
+        """
+        s = self.stats(name, where, chunk_size)
+        m, low, high = s["count"], s["min"], s["max"]
+        if not m:
+            return {q: float("nan") for q in percentiles}
+        if low == high:
+            return {q: low for q in percentiles}
+
+        def bin_of(x):
+            idx = ((x - low) * (_QUANTILE_BINS / (high - low))).astype(np.int64)
+            return np.clip(idx, 0, _QUANTILE_BINS - 1)
+
+        counts = np.zeros(_QUANTILE_BINS, dtype=np.int64)
+        for block in self.chunks([name], where, chunk_size):
+            x = block[name]
+            counts += np.bincount(bin_of(x[np.isfinite(x)]), minlength=_QUANTILE_BINS)
+        cum = np.cumsum(counts)
+
+        positions = {q: q / 100.0 * (m - 1) for q in percentiles}
+        ranks = sorted({r for pos in positions.values() for r in (int(np.floor(pos)), int(np.ceil(pos)))})
+        rank_bin = {r: int(np.searchsorted(cum, r, side="right")) for r in ranks}
+        wanted = sorted(set(rank_bin.values()))
+
+        gathered = {b: [] for b in wanted}
+        for block in self.chunks([name], where, chunk_size):
+            x = block[name]
+            x = x[np.isfinite(x)]
+            idx = bin_of(x)
+            for b in wanted:
+                gathered[b].append(x[idx == b])
+        sorted_bins = {b: np.sort(np.concatenate(v)) for b, v in gathered.items()}
+
+        def value_at(r):
+            b = rank_bin[r]
+            before = cum[b - 1] if b else 0
+            return float(sorted_bins[b][r - before])
+
+        out = {}
+        for q, pos in positions.items():
+            lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+            v_lo, v_hi = value_at(lo), value_at(hi)
+            out[q] = v_lo + (pos - lo) * (v_hi - v_lo)
+        return out
+
+    def select(self, where=None, columns=None, limit=1_000, chunk_size=DEFAULT_CHUNK):
+        """First ``limit`` rows matching ``where`` plus the total match count."""
+        columns = list(columns or self.columns)
+        rows = {k: [] for k in columns}
+        taken, total = 0, 0
+        for block in self.chunks(columns, where, chunk_size):
+            k = len(block[columns[0]])
+            total += k
+            if taken < limit:
+                for name in columns:
+                    rows[name].append(block[name][:limit - taken])
+                taken += min(k, limit - taken)
+        return {k: np.concatenate(v) if v else np.empty(0) for k, v in rows.items()}, total
+
+
+def _mask(block, where):
+    keep = None
+    for name, (low, high) in where.items():
+        x = block[name]
+        m = np.ones(x.shape, dtype=bool)
+        if low is not None:
+            m &= x >= low
+        if high is not None:
+            m &= x <= high
+        keep = m if keep is None else keep & m
+    return keep
+
+
+# -------------------------------
+# Writing runs
+# -------------------------------
+def new_run_path(root=DEFAULT_ROOT, kind="run"):
+    return os.path.join(root, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}")
+
+
+def list_runs(root=DEFAULT_ROOT):
+    """Stores under ``root``, newest first."""
+    if not os.path.isdir(root):
+        return []
+    runs = []
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if os.path.isfile(os.path.join(path, "meta.json")):
+            runs.append(ResultStore.open(path))
+    return sorted(runs, key=lambda s: s.meta["created"], reverse=True)
+
+
+def delete_run(path):
+    """Remove one stored run. Only directories holding a run's meta.json are
+    deleted."""
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        raise ValueError(f"{path} is not a stored run")
+    shutil.rmtree(path)
+
+
+def prune_runs(root=DEFAULT_ROOT, max_runs=DEFAULT_MAX_RUNS, max_bytes=DEFAULT_MAX_BYTES, keep=()):
+    """Delete the oldest runs under ``root`` until at most ``max_runs`` remain
+    and they take at most ``max_bytes`` (None = no limit). Paths in ``keep``
+    are never deleted. Returns the deleted paths."""
+    keep = {os.path.abspath(p) for p in keep}
+    runs = list_runs(root)
+    sizes = [r.nbytes for r in runs]
+    total, deleted = sum(sizes), []
+    for i in range(len(runs) - 1, -1, -1):  # oldest first
+        over_count = max_runs is not None and len(runs) - len(deleted) > max_runs
+        over_size = max_bytes is not None and total > max_bytes
+        if not (over_count or over_size):
+            break
+        if os.path.abspath(runs[i].path) in keep:
+            continue
+        delete_run(runs[i].path)
+        deleted.append(runs[i].path)
+        total -= sizes[i]
+    return deleted
+
+
+def simulate_to_store(base=None, n_paths=1_000_000, distributions=None, seed=None,
+                      root=DEFAULT_ROOT, memory_budget_mb=256, fx_model=None):
+    """``apv_montecarlo.simulate`` writing every path to a new ResultStore.
+
+    Stores the APV, each component PV and the drawn inputs per path, and
+    returns the store reopened read-only. Same draws as ``simulate`` for the
+    same seed, ``fx_model`` and ``memory_budget_mb``.
+    """
+    base = base or APVParams()
+    if distributions is None:
+        distributions = mc.default_distributions(base)
+    rng = np.random.default_rng(seed)
+    n_paths = int(n_paths)
+    chunk = mc.chunk_size_for(base.years, memory_budget_mb)
+    info = {
+        "kind": "monte_carlo",
+        "base": base.to_dict(),
+        "distributions": {k: {"type": type(d).__name__, **asdict(d)} for k, d in distributions.items()},
+        "seed": seed,
+        "fx_model": None if fx_model is None else {"type": type(fx_model).__name__, **asdict(fx_model)},
+    }
+    store = ResultStore.create(new_run_path(root, "mc"), n_paths,
+                               COMPONENTS + tuple(distributions), info)
+    for start in range(0, n_paths, chunk):
+        n = min(chunk, n_paths - start)
+        draws = mc.draw_inputs(base, distributions, rng, n)
+        fx_factor = mc.draw_fx(fx_model, rng, n, base.years)
+        store.write(start, {**mc.path_components(base, draws, n, fx_factor), **draws})
+    store.finish()
+    return ResultStore.open(store.path)
+
+
+def scenarios_to_store(scenarios, method="closed_form", root=DEFAULT_ROOT, chunk_size=None):
+    """Value a ScenarioSet (see ``apv_scenarios``) into a new ResultStore with
+    every component PV and the inputs that vary across the set."""
+    if not isinstance(scenarios, ScenarioSet):
+        scenarios = ScenarioSet.from_records(scenarios)
+    varying = scenarios.varying()
+    store = ResultStore.create(new_run_path(root, "sweep"), len(scenarios), COMPONENTS + varying,
+                               {"kind": "sweep", "method": method})
+    start = 0
+    for chunk in scenarios.chunks(chunk_size or DEFAULT_CHUNK):
+        values = evaluate(chunk, method, outputs=COMPONENTS)
+        values.update({k: chunk.column(k) for k in varying})
+        store.write(start, values)
+        start += len(chunk)
+    store.finish()
+    return ResultStore.open(store.path)
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect stored APV runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="list runs under a results directory")
+    p_list.add_argument("--root", default=DEFAULT_ROOT)
+    p_show = sub.add_parser("show", help="summary statistics of one run")
+    p_show.add_argument("path")
+    p_show.add_argument("--column", default="apv")
+    p_delete = sub.add_parser("delete", help="delete stored runs")
+    p_delete.add_argument("paths", nargs="+")
+    p_prune = sub.add_parser("prune", help="delete the oldest runs beyond a count or size")
+    p_prune.add_argument("--root", default=DEFAULT_ROOT)
+    p_prune.add_argument("--max-runs", type=int, default=DEFAULT_MAX_RUNS)
+    p_prune.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 2 ** 20)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for s in list_runs(args.root):
+            state = "" if s.complete else "  (incomplete)"
+            print(f"{s.path}  {s.meta['info'].get('kind', '?'):<12} {len(s):>14,} rows "
+                  f"{s.nbytes / 2 ** 20:>10,.1f} MiB{state}")
+    elif args.command == "delete":
+        for path in args.paths:
+            delete_run(path)
+    elif args.command == "prune":
+        for path in prune_runs(args.root, args.max_runs, int(args.max_mb * 2 ** 20)):
+            print(f"deleted {path}")
+    else:
+        s = ResultStore.open(args.path)
+        print(json.dumps({"stats": s.stats(args.column),
+                          "percentiles": s.quantiles(args.column)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
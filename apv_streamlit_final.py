@@ -2,6 +2,8 @@
 # Streamlit App: APV Calculator (Centralia-style) with auto-calculated freed-up funds
 
 import streamlit as st
+from apv_engine import FXPath
+from apv_loans import amortize
 
 # ----------------------------------------
 # STREAMLIT APP CONFIG
@@ -59,8 +61,8 @@ affiliate_amount = st.number_input("After-tax affiliate amount (€)", value=750
 st.divider()
 if st.button("📈 Calculate APV"):
 
-    def S_t(t):
-        return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
 
     depreciation_eur = C0_eur / years
 
@@ -86,27 +88,24 @@ if st.button("📈 Calculate APV"):
     pv_dep = round(pv_dep, 2)
 
     # Exhibit 18.4/5 - Concessional loan benefit
-    principal_payment = concession_loan_eur / years
-    remaining = concession_loan_eur
+    # One schedule, read by Exhibits 18.5 and 18.6
+    loan = amortize(concession_loan_eur, i_c, years)
     pv_concess_payments = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, principal_payment = loan.at(t)
         payment_usd = (principal_payment + interest) * S_t(t)
         pv_concess_payments += payment_usd / ((1 + i_d) ** t)
-        remaining -= principal_payment
     pv_concess_payments = round(pv_concess_payments, 2)
 
     dollar_value_concession_loan = concession_loan_eur * S0
     pv_loan_benefit = round(dollar_value_concession_loan - pv_concess_payments, 2)
 
     # Exhibit 18.6 - Interest tax shield
-    remaining = concession_loan_eur
     pv_interest_tax = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, _ = loan.at(t)
         shield_usd = lambda_project * interest * tax_us * S_t(t)
         pv_interest_tax += shield_usd / ((1 + i_d) ** t)
-        remaining -= principal_payment
     pv_interest_tax = round(pv_interest_tax, 2)
 
     # Freed-up affiliate funds (automatically calculated)
@@ -1,5 +1,6 @@
 import streamlit as st
-import pandas as pd
+from apv_engine import FXPath
+from apv_loans import amortize
 
 # ------------------------------------------------------------
 # Streamlit App: APV Calculator (Centralia-style, full logic)
@@ -53,9 +54,10 @@ st.divider()
 # Compute button
 # -------------------------
 if st.button("📈 Calculate APV"):
+    import pandas as pd  # deferred until the exhibits are built
 
-    def S_t(t):
-        return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
 
     depreciation_eur = C0_eur / years
 
@@ -81,14 +83,13 @@ if st.button("📈 Calculate APV"):
     pv_dep = round(pv_dep, 2)
 
     # Exhibit 18.4/18.5 — Concessional loan benefit
-    principal_payment = concession_loan_eur / years
-    remaining = concession_loan_eur
+    # One schedule, read by Exhibits 18.5 and 18.6
+    loan = amortize(concession_loan_eur, i_c, years)
     pv_concess_payments = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, principal_payment = loan.at(t)
         payment_usd = (principal_payment + interest) * S_t(t)
         pv_concess_payments += payment_usd / ((1 + i_d) ** t)
-        remaining -= principal_payment
     pv_concess_payments = round(pv_concess_payments, 2)
     dollar_value_concession_loan = concession_loan_eur * S0
     pv_loan_benefit = round(dollar_value_concession_loan - pv_concess_payments, 2)
@@ -100,16 +101,14 @@ if st.button("📈 Calculate APV"):
     optimal_debt_ratio = borrowing_capacity_usd / project_cost_usd
     lambda_project = optimal_debt_ratio / loan_ratio
 
-    remaining = concession_loan_eur
     pv_interest_tax = 0.0
     rows_186 = []
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, _ = loan.at(t)
         shield_usd = S_t(t) * interest * lambda_project * tax
         pv = shield_usd / ((1 + i_d) ** t)
         rows_186.append([t, round(S_t(t), 4), interest, lambda_project, shield_usd, pv])
         pv_interest_tax += pv
-        remaining -= principal_payment
     pv_interest_tax = round(pv_interest_tax, 2)
 
     # Freed-up affiliate funds (calculated)
@@ -1,5 +1,6 @@
 import streamlit as st
-import pandas as pd
+from apv_engine import FXPath
+from apv_loans import amortize
 
 # ------------------------------------------------------------
 # Streamlit App: Centralia-style Adjusted Present Value (APV)
@@ -43,9 +44,11 @@ with col4:
     concessional_loan_eur = st.number_input("Concessional loan (€)", value=4_000_000.0)
 
 if st.button("📈 Compute APV and Generate Exhibits"):
+    import pandas as pd  # deferred until the exhibits are built
+
     # PPP exchange rate logic
-    def S_t(t):
-        return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
 
     depreciation_eur = C0_eur / years
 
@@ -83,15 +86,15 @@ if st.button("📈 Compute APV and Generate Exhibits"):
     df_183 = pd.DataFrame(rows_183, columns=["Year (t)", "S̄t", "Dt (€)", "S̄tτDt ($)", "S̄tτDt/(1+i_d)^t"])
 
     # ---------------- Exhibit 18.6 ----------------
-    principal_payment = concessional_loan_eur / years
-    remaining, pv_interest_tax, rows_186 = concessional_loan_eur, 0.0, []
+    # Equal-principal schedule (balance, interest, principal per year)
+    loan = amortize(concessional_loan_eur, i_c, years)
+    pv_interest_tax, rows_186 = 0.0, []
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, _ = loan.at(t)
         shield_usd = S_t(t) * tax * lambda_ratio * interest
         pv = shield_usd / ((1 + i_d) ** t)
         pv_interest_tax += pv
         rows_186.append([t, round(S_t(t),4), round(interest,2), round(lambda_ratio,2), round(shield_usd,2), round(pv,2)])
-        remaining -= principal_payment
     df_186 = pd.DataFrame(rows_186, columns=["Year (t)", "S̄t", "Interest (€)", "λ/Proj Ratio", "S̄tτλIt ($)", "S̄tτλIt/(1+i_d)^t"])
 
     # Freed-up affiliate funds logic
@@ -1,6 +1,7 @@
 
 import streamlit as st
-import pandas as pd
+from apv_engine import FXPath
+from apv_loans import amortize
 
 # -------------------------------------------------
 # APV Calculator (Full Exhibits)
@@ -47,9 +48,10 @@ with col4:
     lost_margin_growth = st.number_input("Margin Growth (%)", value=3.0, step=0.1) / 100
 
 if st.button("📈 Calculate Full APV"):
+    import pandas as pd  # deferred until the exhibits are built
 
-    def S_t(t):
-        return S0 * ((1 + pi_d) ** t) / ((1 + pi_f) ** t)
+    # PPP spot path built once (cumulative product), read by year below
+    S_t = FXPath.ppp(S0, pi_d, pi_f, years).at
 
     depreciation_eur = C0_eur / years
 
@@ -83,17 +85,16 @@ if st.button("📈 Calculate Full APV"):
 
     # ---------- Exhibit 18.5 ----------
     exhibit_185 = []
-    principal_payment = concession_loan_eur / years
-    remaining = concession_loan_eur
+    # One schedule, read by Exhibits 18.5 and 18.6
+    loan = amortize(concession_loan_eur, i_c, years)
     pv_concess_payments = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        remaining, interest, principal_payment = loan.at(t)
         payment_eur = principal_payment + interest
         payment_usd = payment_eur * S_t(t)
         pv = payment_usd / ((1 + i_d) ** t)
         exhibit_185.append([t, round(remaining,2), round(interest,2), round(principal_payment,2), round(payment_eur,2), round(S_t(t),4), round(payment_usd,2), round(pv,2)])
         pv_concess_payments += pv
-        remaining -= principal_payment
     df_185 = pd.DataFrame(exhibit_185, columns=["Year","Remaining (€)","Interest (€)","Principal (€)","Payment (€)","S_t ($/€)","Payment ($)","PV @ 8% ($)"])
 
     dollar_value_concession_loan = concession_loan_eur * S0
@@ -103,15 +104,13 @@ if st.button("📈 Calculate Full APV"):
     optimal_debt_ratio = concession_loan_eur / C0_eur
     lambda_project = 0.40 / optimal_debt_ratio
     exhibit_186 = []
-    remaining = concession_loan_eur
     pv_interest_tax = 0.0
     for t in range(1, years + 1):
-        interest = remaining * i_c
+        _, interest, _ = loan.at(t)
         shield_usd = lambda_project * interest * tax_us * S_t(t)
         pv = shield_usd / ((1 + i_d) ** t)
         exhibit_186.append([t, round(S_t(t),4), round(interest,2), round(shield_usd,2), round(pv,2)])
         pv_interest_tax += pv
-        remaining -= principal_payment
     df_186 = pd.DataFrame(exhibit_186, columns=["Year","S_t ($/€)","Interest (€)","Tax Shield ($)=λ×Interest×t×S_t","PV @ 8% ($)"])
 
     # ---------- Freed-up Affiliate Funds ----------
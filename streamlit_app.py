@@ -0,0 +1,55 @@
+# streamlit_app.py
+# Single entry point for every APV calculator in this repo:
+#
+#     streamlit run streamlit_app.py
+#
+# The pages stay the existing scripts; st.navigation only runs the one that is
+# open, so the others cost nothing. Module-level imports here are limited to
+# Streamlit and the engine: pandas/altair are imported by the pages only when
+# an exhibit or chart is actually built. The default Centralia case is valued
+# on a background thread once per server, so the first Calculate hits the cache.
+
+import threading
+
+import streamlit as st
+
+
+@st.cache_resource(show_spinner=False)
+def warm_start():
+    """Value the default case and preload pandas after the first paint."""
+    def run():
+        from apv_cache import cached_compute
+        from apv_engine import APVParams
+
+        cached_compute(APVParams())
+        import pandas  # noqa: F401  (first exhibit render then skips the import)
+
+    thread = threading.Thread(target=run, name="apv-warm-start", daemon=True)
+    thread.start()
+    return thread
+
+
+PAGES = {
+    "Centralia (shared engine)": [
+        st.Page("apv_exhibits_app.py", title="APV with exhibits", icon="💰", default=True),
+        st.Page("apv_final.py", title="APV summary", icon="🧮"),
+    ],
+    "Earlier variants": [
+        st.Page("apv_streamlit_final.py", title="Centralia style", icon="📄"),
+        st.Page("apv_interactive_app.py", title="Interactive", icon="📄"),
+        st.Page("final_apv_calculator_streamlit.py", title="Centralia case", icon="📄"),
+        st.Page("apv_app.py", title="APV (style)", icon="📄"),
+        st.Page("apv_full_app.py", title="Full exhibits (λ = loan ratio)", icon="📄"),
+        st.Page("apv_full_exhibits_app.py", title="Full exhibits", icon="📄"),
+        st.Page("final_apv_full_app.py", title="Exhibits without loan benefit", icon="📄"),
+        st.Page("final_centralia_apv_full_exhibits_v1.py", title="Full exhibits v1", icon="📄"),
+    ],
+    "Simplified models": [
+        st.Page("apv_calculator.py", title="Quick APV", icon="➗"),
+        st.Page("apv_calc_deepesh.py", title="Deepesh APV", icon="➗"),
+    ],
+}
+
+page = st.navigation(PAGES)
+page.run()
+warm_start()
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import apv_export
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_parquet_parts_share_one_schema(tmp_path):
+    # The id column is an int in the first chunk and text in the second
+    src = tmp_path / "in.csv"
+    pd.DataFrame({"project": [1, 2, 3, "p4", "p5", "p6"],
+                  "S0": np.linspace(1.2, 1.4, 6)}).to_csv(src, index=False)
+    out = tmp_path / "exhibits"
+    apv_export.export_file(str(src), str(out), "parquet", chunk_size=3, id_column="project")
+
+    for name in apv_export.TABLES:
+        table = pq.read_table(out / name)
+        assert table.column_names == list(apv_export.table_columns(name))
+    summary = pq.read_table(out / "summary")
+    assert summary.column("Project").to_pylist() == ["1", "2", "3", "p4", "p5", "p6"]
+    assert pq.read_table(out / "exhibit_182").num_rows == 6 * 8
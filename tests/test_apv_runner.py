@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import apv_runner
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _drifting_frame():
+    # "id" is an int until row 5, then text; "qty" gets a blank in the second chunk
+    return pd.DataFrame({
+        "id": [0, 1, 2, 3, 4, "x5", "x6", "x7", "x8", "x9"],
+        "qty": [1, 2, 3, 4, 5, 6, None, 8, 9, 10],
+        "S0": np.linspace(1.2, 1.4, 10),
+    })
+
+
+@pytest.mark.parametrize("output", ["out.csv", "out.parquet"])
+def test_csv_columns_drifting_between_chunks(tmp_path, output):
+    src = tmp_path / "in.csv"
+    _drifting_frame().to_csv(src, index=False)
+    stats = apv_runner.run(str(src), str(tmp_path / output), chunk_size=5)
+    assert stats["rows"] == 10
+
+    out = (pd.read_csv(tmp_path / output, dtype={"id": str}) if output.endswith(".csv")
+           else pd.read_parquet(tmp_path / output))
+    assert out["id"].tolist() == ["0", "1", "2", "3", "4", "x5", "x6", "x7", "x8", "x9"]
+    assert out["qty"].isna().tolist() == [False] * 6 + [True] + [False] * 3
+    assert np.isfinite(out["apv"]).all()
+
+
+def test_parquet_int_column_with_nulls_in_a_later_chunk(tmp_path):
+    src = tmp_path / "in.parquet"
+    table = pa.table({"qty": pa.array([1, 2, 3, 4, None, 6], type=pa.int64()),
+                      "S0": np.linspace(1.2, 1.4, 6)})
+    pq.write_table(table, src)
+    apv_runner.run(str(src), str(tmp_path / "out.parquet"), chunk_size=3)
+
+    out = pq.read_table(tmp_path / "out.parquet")
+    assert out.schema.field("qty").type == pa.int64()
+    assert out.column("qty").to_pylist() == [1, 2, 3, 4, None, 6]